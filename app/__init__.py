@@ -1,21 +1,19 @@
 from flask import Flask, render_template
-from datetime import datetime, timezone
-from datetime import timedelta
-from sqlalchemy import inspect
 
-from .models.log import Log
 from .extensions import db, migrate
-from . import routes
+from .dbpool import init_pool_metrics
+from .metrics import init_request_metrics
+from .audit import init_audit
+from .identity import init_admin_roster
+from .commands import init_commands
+from .assets import init_assets
+from .compress import init_compression
+from .fragments import init_fragment_cache
+from .replica import init_replica
+from .snapshots import init_export_snapshots
+from .retention import start_log_purger
+from . import api, routes
 
-def cleanup_logs():
-    inspector = inspect(db.engine)
-    if "logs" not in inspector.get_table_names():
-        return
-
-    cutoff = datetime.now(timezone.utc) - timedelta(days=7)
-    db.session.query(Log).filter(Log.time < cutoff).delete()
-    db.session.commit()
-        
 def create_app(config_class="app.config.Config"):
     app = Flask(__name__, instance_relative_config=True)
     app.config.from_object(config_class)
@@ -23,11 +21,22 @@ def create_app(config_class="app.config.Config"):
     # init extensions
     db.init_app(app)
     migrate.init_app(app, db)
+    init_pool_metrics(app)
+    init_request_metrics(app)
+    init_audit(app)
+    init_admin_roster(app)
+    init_commands(app)
+    init_assets(app)
+    init_compression(app)
+    init_fragment_cache(app)
+    init_replica(app)
+    init_export_snapshots(app)
 
     # register routes
     app.register_blueprint(routes.bp)
+    app.register_blueprint(api.bp)
     
-    with app.app_context():
-        cleanup_logs()
+    # log retention runs in the background, not on worker boot
+    start_log_purger(app)
     
-    return app
\ No newline at end of file
+    return app
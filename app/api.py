@@ -0,0 +1,175 @@
+import hashlib
+import json
+from functools import wraps
+from flask import Blueprint, Response, jsonify, request
+from sqlalchemy import func, select
+from sqlalchemy.orm import joinedload
+
+from .models.record import Record
+from .models.log import Log
+from .extensions import db
+from .identity import get_current_user, is_admin
+from .leaderboard import DEFAULT_SORT, SORTS, leaderboard_query, sort_keys
+from .pagination import cached_count, keyset_page
+from .search import log_filter
+from .routes import MILESTONE
+from . import versions
+
+# Read-only JSON API. Every response carries a strong ETag computed from a
+# cheap change marker (data_versions counters, or the log id range) plus the
+# request's parameters, so a poll with a matching If-None-Match gets a 304
+# before any of the page or count queries run.
+
+bp = Blueprint("api", __name__, url_prefix="/api/v1")
+
+API_VERSION = 1
+RECORDS_PER_PAGE = 50
+USERS_PER_PAGE = 20
+LOGS_PER_PAGE = 20
+
+# ---------------- Helpers ----------------
+def api_login_required(f):
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        if not get_current_user():
+            return jsonify(error="login required"), 401
+        return f(*args, **kwargs)
+    return wrapper
+
+def api_admin_required(f):
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        u = get_current_user()
+        if not u:
+            return jsonify(error="login required"), 401
+        if not is_admin(u):
+            return jsonify(error="admin only"), 403
+        return f(*args, **kwargs)
+    return wrapper
+
+def _page_args():
+    return {
+        "after": request.args.get("after"),
+        "before": request.args.get("before"),
+        "last": bool(request.args.get("last")),
+    }
+
+def conditional(marker, build):
+    """jsonify(build()) tagged with an ETag of `marker` and the query
+    string, or a bare 304 when the client already holds that ETag."""
+    etag = hashlib.sha256(json.dumps(
+        [API_VERSION, request.endpoint, marker, sorted(request.args.items(multi=True))],
+        default=str,
+    ).encode()).hexdigest()[:32]
+
+    # weak comparison, as If-None-Match requires: compressed responses
+    # carry the same tag marked weak (see compress.py)
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(build())
+    response.set_etag(etag)
+    # per-user data: browsers may keep it but must revalidate every time
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+def _record(r: Record) -> dict:
+    return {
+        "id": r.id,
+        "time": r.time.isoformat(),
+        "type": r.type,
+        "amount": r.amount,
+        "reason": r.reason,
+        "author": r.author.name if r.author else r.author_account,
+    }
+
+# ---------------- Routes ----------------
+@bp.get("/me")
+@api_login_required
+def me():
+    """Balance of the signed-in user and a page of their records."""
+    user = get_current_user()
+    marker = [user.account, versions.current("users", "records")]
+
+    def build():
+        page = keyset_page(
+            select(Record)
+            .options(joinedload(Record.author))
+            .where(Record.user_account == user.account),
+            "records", [Record.time, Record.id], True, RECORDS_PER_PAGE,
+            scalars=True, **_page_args(),
+        )
+        return {
+            "account": user.account,
+            "name": user.name,
+            "points": user.points,
+            "record_count": user.record_count,
+            "milestone": MILESTONE,
+            "records": [_record(r) for r in page.items],
+            "next_cursor": page.next_cursor,
+            "prev_cursor": page.prev_cursor,
+        }
+
+    return conditional(marker, build)
+
+@bp.get("/leaderboard")
+@api_admin_required
+def leaderboard():
+    search = request.args.get("search", "").strip()
+    sort = request.args.get("sort", DEFAULT_SORT)
+    if sort not in SORTS:
+        sort = DEFAULT_SORT
+    version = versions.current("users")["users"]
+
+    def build():
+        query = leaderboard_query(search)
+        columns, descending = sort_keys(sort)
+        page = keyset_page(query, sort, columns, descending, USERS_PER_PAGE, **_page_args())
+        return {
+            "sort": sort,
+            "search": search,
+            # keyed on the version too, so a new ETag never carries a stale total
+            "total": cached_count(("users", search, version), query),
+            "users": [
+                {"account": u.account, "name": u.name, "points": u.points, "record_count": u.count}
+                for u in page.items
+            ],
+            "next_cursor": page.next_cursor,
+            "prev_cursor": page.prev_cursor,
+        }
+
+    return conditional(version, build)
+
+@bp.get("/logs")
+@api_admin_required
+def logs():
+    q = request.args.get("q", "")
+    # logs are only ever appended (new ids) or purged from the old end
+    # (min id moves), so the id range is a complete change marker
+    marker = db.session.execute(select(func.min(Log.id), func.max(Log.id))).one()
+
+    def build():
+        query = select(Log).options(joinedload(Log.user))
+        if q:
+            query = query.filter(log_filter(q))
+        page = keyset_page(query, "logs", [Log.time, Log.id], True, LOGS_PER_PAGE,
+                           scalars=True, **_page_args())
+        return {
+            "q": q,
+            "total": cached_count(("logs", q, *marker), query),
+            "logs": [
+                {
+                    "id": log.id,
+                    "time": log.time.isoformat(),
+                    "account": log.user_account,
+                    "name": log.user.name if log.user else None,
+                    "url": log.url,
+                    "log": log.log,
+                }
+                for log in page.items
+            ],
+            "next_cursor": page.next_cursor,
+            "prev_cursor": page.prev_cursor,
+        }
+
+    return conditional(list(marker), build)
@@ -0,0 +1,55 @@
+import hashlib
+import os
+import threading
+from flask import current_app, request, url_for
+from werkzeug.security import safe_join
+
+# Templates link static files through asset_url(), which appends a hash of
+# the file's content (?v=...). A request carrying the current hash can be
+# cached for a year: a changed file gets a new URL instead of a stale hit.
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+_lock = threading.Lock()
+_fingerprints = {}      # filename -> (mtime_ns, size, digest)
+
+def fingerprint(filename: str):
+    """Short content hash of a static file, or None if it doesn't exist.
+    Recomputed only when the file's mtime or size changes."""
+    path = safe_join(current_app.static_folder, filename)
+    try:
+        stat = os.stat(path) if path else None
+    except OSError:
+        stat = None
+    if stat is None:
+        return None
+
+    with _lock:
+        hit = _fingerprints.get(filename)
+    if hit and hit[:2] == (stat.st_mtime_ns, stat.st_size):
+        return hit[2]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(65536), b""):
+            digest.update(block)
+    value = digest.hexdigest()[:12]
+    with _lock:
+        _fingerprints[filename] = (stat.st_mtime_ns, stat.st_size, value)
+    return value
+
+def asset_url(filename: str) -> str:
+    """url_for("static", ...) with the content fingerprint appended."""
+    return url_for("static", filename=filename, v=fingerprint(filename))
+
+def _static_cache_headers(response):
+    if request.endpoint != "static" or response.status_code not in (200, 304):
+        return response
+    version = request.args.get("v")
+    if version and version == fingerprint(request.view_args["filename"]):
+        response.headers["Cache-Control"] = IMMUTABLE
+    return response
+
+def init_assets(app):
+    app.jinja_env.globals["asset_url"] = asset_url
+    app.after_request(_static_cache_headers)
@@ -0,0 +1,142 @@
+import atexit
+import queue
+import threading
+from datetime import datetime, timezone
+from flask import current_app
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, insert
+
+from .models.log import Log
+from .extensions import db
+
+# AUDIT_LOG_MODE:
+#   async  handlers enqueue log rows once their transaction commits and a
+#          background thread bulk-inserts them (default)
+#   sync   log rows are added to the handler's own transaction, so an
+#          action and its audit entry commit or roll back together
+AUDIT_MODES = ("async", "sync")
+
+# seconds close() waits, past one flush interval, for a batch the flusher
+# is still writing
+CLOSE_TIMEOUT = 5
+
+class AuditWriter:
+    """Bounded queue of log rows drained by one flusher thread per worker."""
+
+    def __init__(self, app):
+        self.app = app
+        self.batch_size = app.config["AUDIT_BATCH_SIZE"]
+        self.flush_interval = app.config["AUDIT_FLUSH_INTERVAL"]
+        self.queue = queue.Queue(maxsize=app.config["AUDIT_QUEUE_SIZE"])
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopping = threading.Event()
+
+    def enqueue(self, rows):
+        self._ensure_started()
+        for i, row in enumerate(rows):
+            try:
+                self.queue.put_nowait(row)
+            except queue.Full:
+                # never drop audit entries: write the overflow inline
+                self._write(rows[i:])
+                return
+
+    def flush(self):
+        """Write everything queued so far from the calling thread."""
+        while True:
+            batch = self._drain(block=False)
+            if not batch:
+                return
+            self._write(batch)
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _drain(self, block: bool):
+        batch = []
+        try:
+            batch.append(self.queue.get(block=block, timeout=self.flush_interval if block else None))
+            while len(batch) < self.batch_size:
+                batch.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _run(self):
+        while not self._stopping.is_set():
+            batch = self._drain(block=True)
+            if batch:
+                self._write(batch)
+
+    def _write(self, rows):
+        # runs on the flusher thread and at exit too, outside any request
+        with self.app.app_context():
+            try:
+                with db.engine.begin() as conn:
+                    conn.execute(insert(Log), rows)
+            except Exception:
+                self.app.logger.exception(
+                    "failed to write %d audit logs: %r", len(rows), [row["log"] for row in rows]
+                )
+
+    def close(self):
+        """Stop the flusher and write what is left (flush-on-shutdown).
+        Waits for the flusher first, so the batch it holds is written
+        before the process exits."""
+        self._stopping.set()
+        with self._lock:
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=self.flush_interval + CLOSE_TIMEOUT)
+        self.flush()
+
+def audit_log(account: str, url: str, log: str = None):
+    """Record an audit entry as part of the current transaction.
+
+    The entry is written when the caller commits (sync) or queued for the
+    background writer right after that commit (async); either way it is
+    discarded if the transaction rolls back.
+    """
+    row = {
+        "user_account": account,
+        "url": url,
+        "log": log,
+        "time": datetime.now(timezone.utc),
+    }
+    if current_app.config["AUDIT_LOG_MODE"] == "sync":
+        db.session.add(Log(**row))
+    else:
+        db.session.info.setdefault("audit_pending", []).append(row)
+
+def audit_logs(account: str, url: str, logs):
+    """audit_log for many entries by one account; in sync mode they are
+    bulk-inserted instead of added to the session one object at a time."""
+    now = datetime.now(timezone.utc)
+    rows = [{"user_account": account, "url": url, "log": log, "time": now} for log in logs]
+    if not rows:
+        return
+    if current_app.config["AUDIT_LOG_MODE"] == "sync":
+        db.session.execute(insert(Log), rows)
+    else:
+        db.session.info.setdefault("audit_pending", []).extend(rows)
+
+@event.listens_for(Session, "after_commit")
+def _enqueue_pending(session):
+    rows = session.info.pop("audit_pending", None)
+    if rows:
+        current_app.extensions["audit"].enqueue(rows)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop("audit_pending", None)
+
+def init_audit(app):
+    mode = app.config["AUDIT_LOG_MODE"]
+    if mode not in AUDIT_MODES:
+        raise ValueError(f"AUDIT_LOG_MODE must be one of {', '.join(AUDIT_MODES)}, got {mode!r}")
+    app.extensions["audit"] = AuditWriter(app)
@@ -0,0 +1,87 @@
+from collections import defaultdict
+from datetime import datetime, timezone
+from sqlalchemy import insert, select, update
+
+from .models.user import User
+from .models.record import Record
+from .extensions import db
+from .audit import audit_logs
+from . import rollups, versions
+
+APPLIED = "applied"
+UNKNOWN = "unknown"
+
+MIN_POINT_UPDATE = -100
+MAX_POINT_UPDATE = 100
+
+def clamp_amount_update(amount: int) -> int:
+    return min(max(amount, MIN_POINT_UPDATE), MAX_POINT_UPDATE)
+
+def adjustment_log(amount: int, account: str, name: str, reason: str) -> str:
+    return f"{'Add' if amount > 0 else 'Remove'} {abs(amount)} points {'from' if amount > 0 else 'to'} {account} {name} for the reason [ {reason} ]"
+
+def write_adjustments(author: User, entries, names: dict, url: str):
+    """Write (account, amount, reason) entries for known accounts (`names`
+    maps each to its user name) without committing.
+
+    Records are bulk-inserted and counted into the rollups, audit logs go
+    through audit_logs, and users.points / record_count are bumped with one
+    UPDATE per distinct delta, so the cost does not grow in round-trips per
+    account.
+    """
+    if not entries:
+        return
+    now = datetime.now(timezone.utc)
+    db.session.execute(insert(Record), [
+        {
+            "user_account": account,
+            "author_account": author.account,
+            "time": now,
+            "type": "add" if amount > 0 else "remove",
+            "amount": amount,
+            "reason": reason,
+        }
+        for account, amount, reason in entries
+    ])
+    rollups.add_records([
+        (now, "add" if amount > 0 else "remove", author.account, account, amount)
+        for account, amount, _ in entries
+    ])
+    audit_logs(author.account, url, [
+        adjustment_log(amount, account, names[account], reason)
+        for account, amount, reason in entries
+    ])
+
+    # accounts sharing the same (points, records) delta share one UPDATE
+    deltas = defaultdict(lambda: [0, 0])
+    for account, amount, _ in entries:
+        deltas[account][0] += amount
+        deltas[account][1] += 1
+    groups = defaultdict(list)
+    for account, (amount, count) in deltas.items():
+        groups[amount, count].append(account)
+    for (amount, count), group in groups.items():
+        db.session.execute(
+            update(User)
+            .where(User.account.in_(group))
+            .values(points=User.points + amount, record_count=User.record_count + count)
+            .execution_options(synchronize_session=False)
+        )
+    versions.bump("records", "users")
+
+def apply_adjustments(author: User, entries, url: str) -> dict:
+    """Apply (account, amount, reason) entries in one transaction.
+
+    Amounts must already be normalized and clamped. Targets are loaded with
+    a single IN query and written by write_adjustments.
+
+    Returns {account: APPLIED | UNKNOWN} in input order.
+    """
+    accounts = list(dict.fromkeys(account for account, _, _ in entries))
+    names = dict(db.session.execute(
+        select(User.account, User.name).where(User.account.in_(accounts))
+    ).all())
+    write_adjustments(author, [e for e in entries if e[0] in names], names, url)
+
+    db.session.commit()
+    return {account: APPLIED if account in names else UNKNOWN for account in accounts}
@@ -0,0 +1,83 @@
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from . import ledger, rollups
+from .imports import ImportFileError
+from .retention import purge_expired_logs
+from .roster import import_roster_file
+
+logs_cli = AppGroup("logs", help="Audit log maintenance.")
+
+@logs_cli.command("purge")
+@click.option("--days", type=int, default=None, help="Retention in days (default LOG_RETENTION_DAYS).")
+@click.option("--batch-size", type=int, default=None, help="Rows per delete (default LOG_PURGE_BATCH_SIZE).")
+def purge_logs(days, batch_size):
+    """Delete expired logs in bounded batches."""
+    deleted = purge_expired_logs(
+        days if days is not None else current_app.config["LOG_RETENTION_DAYS"],
+        batch_size or current_app.config["LOG_PURGE_BATCH_SIZE"],
+    )
+    if deleted is None:
+        click.echo("Another worker is purging logs; skipped.")
+    else:
+        click.echo(f"Purged {deleted} expired logs.")
+
+points_cli = AppGroup("points", help="Points ledger reconciliation.")
+
+def _echo_drifts(drifts):
+    for d in drifts:
+        click.echo(
+            f"{d.account}: points {d.points} -> {d.expected_points}, "
+            f"records {d.record_count} -> {d.expected_count}"
+        )
+
+@points_cli.command("verify")
+def verify_points():
+    """Report users whose stored points disagree with their records."""
+    drifts = ledger.verify()
+    _echo_drifts(drifts)
+    if drifts:
+        raise click.ClickException(f"{len(drifts)} users have drifted.")
+    click.echo("All balances match their records.")
+
+@points_cli.command("rebuild")
+def rebuild_points():
+    """Repair drifted balances and advance every checkpoint."""
+    drifts = ledger.rebuild()
+    _echo_drifts(drifts)
+    click.echo(f"Repaired {len(drifts)} users; checkpoints advanced.")
+
+members_cli = AppGroup("members", help="Member roster management.")
+
+@members_cli.command("import")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--workers", type=int, default=None, help="Hashing processes (default ROSTER_HASH_WORKERS).")
+def import_members(path, workers):
+    """Create members from a CSV/XLSX file with account, name and password columns."""
+    if workers is None:
+        workers = current_app.config["ROSTER_HASH_WORKERS"]
+    try:
+        with open(path, "rb") as f:
+            report = import_roster_file(path, f, url="flask members import", workers=workers)
+    except ImportFileError as e:
+        raise click.ClickException(str(e))
+    for e in report.errors:
+        click.echo(f"line {e.line}: {e.account or '-'}: {e.error}", err=True)
+    click.echo(f"Created {len(report.created)} members, {len(report.errors)} rows rejected.")
+    if report.errors:
+        raise SystemExit(1)
+
+rollups_cli = AppGroup("rollups", help="Daily and semester points rollups.")
+
+@rollups_cli.command("backfill")
+def backfill_rollups():
+    """Rebuild the rollup tables from every record."""
+    count = rollups.backfill()
+    click.echo(f"Rolled up {count} records.")
+
+def init_commands(app):
+    app.cli.add_command(logs_cli)
+    app.cli.add_command(points_cli)
+    app.cli.add_command(members_cli)
+    app.cli.add_command(rollups_cli)
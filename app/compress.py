@@ -0,0 +1,100 @@
+import gzip
+import zlib
+from flask import request
+
+try:
+    import brotli   # optional: pip install brotli
+except ImportError:
+    brotli = None
+
+# Response compression for HTML, JSON and the streamed text exports.
+# Buffered bodies are compressed when they reach COMPRESS_MIN_SIZE;
+# streamed ones (exports) are always compressed, chunk by chunk. send_file
+# responses (static files, XLSX, which is already a zip) are left alone so
+# they keep their conditional/range handling; text export snapshots are
+# stored precompressed instead (compress_file, snapshots.py).
+
+COMPRESSIBLE = (
+    "text/html", "text/plain", "text/csv", "text/sql", "text/css",
+    "application/json", "application/javascript",
+)
+BROTLI_QUALITY = 5      # brotli's default (11) is far too slow per request
+
+# file suffixes of precompressed variants, see compress_file
+SUFFIXES = {"gzip": ".gz", "br": ".br"}
+FILE_CHUNK = 64 * 1024
+
+def encodings() -> list:
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+def best_encoding(offered=None):
+    """The client's preferred encoding among `offered` (default: all we
+    can produce), or None for identity."""
+    return request.accept_encodings.best_match(offered if offered is not None else encodings())
+
+def _compressor(encoding: str, level: int):
+    """(process(bytes) -> bytes, finish() -> bytes) for one stream."""
+    if encoding == "br":
+        c = brotli.Compressor(quality=BROTLI_QUALITY)
+        return c.process, c.finish
+    c = zlib.compressobj(level, zlib.DEFLATED, 31)     # 31: gzip container
+    return c.compress, c.flush
+
+def _stream(body, encoding, level):
+    process, finish = _compressor(encoding, level)
+    for chunk in body:
+        if isinstance(chunk, str):
+            chunk = chunk.encode()
+        out = process(chunk)
+        if out:
+            yield out
+    yield finish()
+
+def _compress_response(app, response):
+    config = app.config
+    if (
+        not config["COMPRESS_RESPONSES"]
+        or response.direct_passthrough
+        or response.status_code < 200 or response.status_code in (204, 304)
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE
+    ):
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = best_encoding()
+    if encoding is None:
+        return response
+
+    level = config["COMPRESS_LEVEL"]
+    if response.is_streamed:
+        response.response = _stream(response.response, encoding, level)
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < config["COMPRESS_MIN_SIZE"]:
+            return response
+        if encoding == "br":
+            data = brotli.compress(data, quality=BROTLI_QUALITY)
+        else:
+            data = gzip.compress(data, compresslevel=level)
+        response.set_data(data)
+
+    response.headers["Content-Encoding"] = encoding
+    # the encoded bytes differ from the identity ones, so a strong ETag
+    # no longer names them; If-None-Match compares weakly anyway
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+def compress_file(source, target, encoding: str, level: int):
+    """Encode the file `source` into `target` chunk by chunk, for files
+    served precompressed with send_file (which this hook leaves alone)."""
+    process, finish = _compressor(encoding, level)
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        for chunk in iter(lambda: src.read(FILE_CHUNK), b""):
+            dst.write(process(chunk))
+        dst.write(finish())
+
+def init_compression(app):
+    app.after_request(lambda response: _compress_response(app, response))
@@ -1,7 +1,7 @@
 from pathlib import Path
 import os
 import secrets
-from sqlalchemy.pool import NullPool
+from .dbpool import engine_options
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 INSTANCE_DIR = BASE_DIR / "instance"
@@ -13,15 +13,62 @@ class Config:
 
     # Pick DB from env (Railway)
     SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL")
-    SQLALCHEMY_ENGINE_OPTIONS = {
-        "poolclass": NullPool,      # serverless-friendly: don't hold idle conns
-        "pool_pre_ping": True,      # validate connections
-    }
+    # Pool mode and sizing from env (DB_POOL_MODE, DB_POOL_SIZE, ...), see dbpool.py
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options()
     
     SESSION_COOKIE_SECURE = True      # only over HTTPS
     SESSION_COOKIE_HTTPONLY = True    # JS can’t read cookie
     SESSION_COOKIE_SAMESITE = "Lax"   # or "Strict" if you don’t embed cross-site
 
+    # seconds a worker trusts its cached admin roster between version checks
+    ADMIN_ROSTER_TTL = int(os.environ.get("ADMIN_ROSTER_TTL", 5))
+
+    # log retention, see retention.py; LOG_PURGE_INTERVAL=0 leaves it to `flask logs purge`
+    LOG_RETENTION_DAYS = int(os.environ.get("LOG_RETENTION_DAYS", 7))
+    LOG_PURGE_BATCH_SIZE = int(os.environ.get("LOG_PURGE_BATCH_SIZE", 1000))
+    LOG_PURGE_INTERVAL = int(os.environ.get("LOG_PURGE_INTERVAL", 3600))
+
+    # audit logs: "async" queues them for a background writer, "sync" writes
+    # them in the request's own transaction, see audit.py
+    AUDIT_LOG_MODE = os.environ.get("AUDIT_LOG_MODE", "async")
+    AUDIT_QUEUE_SIZE = int(os.environ.get("AUDIT_QUEUE_SIZE", 10000))
+    AUDIT_BATCH_SIZE = int(os.environ.get("AUDIT_BATCH_SIZE", 200))
+    AUDIT_FLUSH_INTERVAL = float(os.environ.get("AUDIT_FLUSH_INTERVAL", 1.0))
+
+    # /metrics accepts "Authorization: Bearer <METRICS_TOKEN>" (for the
+    # scraper) or an admin session; requests slower than SLOW_REQUEST_SECONDS
+    # are logged with their slowest statements (0 turns the log off)
+    METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+    SLOW_REQUEST_SECONDS = float(os.environ.get("SLOW_REQUEST_SECONDS", 0))
+
+    # processes hashing passwords during a roster import (0 = one per CPU)
+    ROSTER_HASH_WORKERS = int(os.environ.get("ROSTER_HASH_WORKERS", 0))
+
+    # gzip (or brotli, when installed) for HTML/JSON responses of at least
+    # COMPRESS_MIN_SIZE bytes and for streamed exports, see compress.py
+    COMPRESS_RESPONSES = os.environ.get("COMPRESS_RESPONSES", "1").lower() not in ("0", "false", "no", "off")
+    COMPRESS_MIN_SIZE = int(os.environ.get("COMPRESS_MIN_SIZE", 1024))
+    COMPRESS_LEVEL = int(os.environ.get("COMPRESS_LEVEL", 6))
+
+    # admin leaderboard fragment cache: "memory" (per worker), "sqlite"
+    # (file shared by the workers) or "off", see fragments.py
+    LEADERBOARD_CACHE = os.environ.get("LEADERBOARD_CACHE", "memory")
+    LEADERBOARD_CACHE_ENTRIES = int(os.environ.get("LEADERBOARD_CACHE_ENTRIES", 256))
+    LEADERBOARD_CACHE_BYTES = int(os.environ.get("LEADERBOARD_CACHE_BYTES", 16 * 1024 * 1024))
+    LEADERBOARD_CACHE_PATH = os.environ.get("LEADERBOARD_CACHE_PATH") or str(INSTANCE_DIR / "leaderboard_cache.sqlite")
+
+    # optional read replica for GET pages and exports, see replica.py; a
+    # client reads from the primary for REPLICA_STICKY_SECONDS after a POST
+    REPLICA_DATABASE_URL = os.environ.get("REPLICA_DATABASE_URL")
+    SQLALCHEMY_BINDS = {"replica": REPLICA_DATABASE_URL} if REPLICA_DATABASE_URL else {}
+    REPLICA_STICKY_SECONDS = int(os.environ.get("REPLICA_STICKY_SECONDS", 10))
+    REPLICA_CHECK_INTERVAL = float(os.environ.get("REPLICA_CHECK_INTERVAL", 2.0))
+
+    # single-table exports are served from snapshot files rebuilt in the
+    # background after writes, see snapshots.py
+    EXPORT_SNAPSHOTS = os.environ.get("EXPORT_SNAPSHOTS", "1").lower() not in ("0", "false", "no", "off")
+    EXPORT_SNAPSHOT_DIR = os.environ.get("EXPORT_SNAPSHOT_DIR") or str(INSTANCE_DIR / "exports")
+
 class DevConfig(Config):
     SQLALCHEMY_DATABASE_URI = f"sqlite:///{INSTANCE_DIR / 'app.sqlite'}"
     SESSION_COOKIE_SECURE = True      # only over HTTPS
@@ -0,0 +1,159 @@
+import os
+import threading
+import time
+from sqlalchemy import event, exc
+from sqlalchemy.pool import NullPool, QueuePool
+
+from .extensions import db
+
+# DB_POOL_MODE:
+#   queue      keep a per-worker QueuePool of warm connections (default)
+#   null       open and close a connection per checkout (serverless)
+#   pgbouncer  an external PgBouncer does the pooling; hold nothing locally
+POOL_MODES = ("queue", "null", "pgbouncer")
+
+def _env_int(env, key: str, default: int) -> int:
+    try:
+        return int(env.get(key, default))
+    except ValueError:
+        return default
+
+def _env_bool(env, key: str, default: bool) -> bool:
+    value = env.get(key)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+def engine_options(env=os.environ) -> dict:
+    """SQLALCHEMY_ENGINE_OPTIONS for the pool mode picked in the environment."""
+    mode = env.get("DB_POOL_MODE", "queue").strip().lower()
+    if mode not in POOL_MODES:
+        raise ValueError(f"DB_POOL_MODE must be one of {', '.join(POOL_MODES)}, got {mode!r}")
+
+    if mode == "null":
+        return {
+            "poolclass": NullPool,      # serverless-friendly: don't hold idle conns
+            "pool_pre_ping": _env_bool(env, "DB_POOL_PRE_PING", True),
+        }
+    if mode == "pgbouncer":
+        # connections are cheap to open against a local bouncer, and a
+        # pre-ping would cost a round-trip through it on every checkout
+        return {
+            "poolclass": NullPool,
+            "pool_pre_ping": _env_bool(env, "DB_POOL_PRE_PING", False),
+        }
+    return {
+        "poolclass": QueuePool,
+        "pool_size": _env_int(env, "DB_POOL_SIZE", 5),
+        "max_overflow": _env_int(env, "DB_POOL_MAX_OVERFLOW", 5),
+        "pool_timeout": _env_int(env, "DB_POOL_TIMEOUT", 10),
+        "pool_recycle": _env_int(env, "DB_POOL_RECYCLE", 1800),
+        "pool_pre_ping": _env_bool(env, "DB_POOL_PRE_PING", True),
+    }
+
+class PoolStats:
+    """Checkout/connect counters and checkout wait times for one worker's
+    engine pool."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.connect_seconds = 0.0
+        self.invalidations = 0
+        self.checked_out = 0
+        self.peak_checked_out = 0
+        self.checkout_wait_seconds = 0.0
+        self.max_checkout_wait = 0.0
+        self.checkout_timeouts = 0
+
+    def attach(self):
+        connecting = threading.local()
+        raw_connection = self.engine.raw_connection
+
+        # there's no pool event before a checkout, so time the engine's
+        # call into the pool: waiting for a free connection, opening an
+        # overflow one and the pre-ping all count
+        def _timed_raw_connection():
+            start = time.perf_counter()
+            timed_out = False
+            try:
+                return raw_connection()
+            except exc.TimeoutError:
+                timed_out = True
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                with self._lock:
+                    self.checkout_wait_seconds += elapsed
+                    self.max_checkout_wait = max(self.max_checkout_wait, elapsed)
+                    self.checkout_timeouts += timed_out
+
+        self.engine.raw_connection = _timed_raw_connection
+
+        @event.listens_for(self.engine, "do_connect")
+        def _do_connect(dialect, conn_rec, cargs, cparams):
+            connecting.start = time.perf_counter()
+
+        @event.listens_for(self.engine, "connect")
+        def _connect(dbapi_conn, conn_rec):
+            elapsed = time.perf_counter() - getattr(connecting, "start", time.perf_counter())
+            with self._lock:
+                self.connects += 1
+                self.connect_seconds += elapsed
+
+        @event.listens_for(self.engine, "checkout")
+        def _checkout(dbapi_conn, conn_rec, conn_proxy):
+            with self._lock:
+                self.checkouts += 1
+                self.checked_out += 1
+                self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+        @event.listens_for(self.engine, "checkin")
+        def _checkin(dbapi_conn, conn_rec):
+            with self._lock:
+                self.checkins += 1
+                self.checked_out = max(self.checked_out - 1, 0)
+
+        @event.listens_for(self.engine, "invalidate")
+        def _invalidate(dbapi_conn, conn_rec, exception):
+            with self._lock:
+                self.invalidations += 1
+
+    def snapshot(self) -> dict:
+        pool = self.engine.pool
+        with self._lock:
+            stats = {
+                "pid": os.getpid(),
+                "pool": type(pool).__name__,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "checked_out": self.checked_out,
+                "peak_checked_out": self.peak_checked_out,
+                "checkout_wait_seconds": round(self.checkout_wait_seconds, 6),
+                "max_checkout_wait_seconds": round(self.max_checkout_wait, 6),
+                "checkout_timeouts": self.checkout_timeouts,
+                "connects": self.connects,
+                "connect_seconds": round(self.connect_seconds, 6),
+                "invalidations": self.invalidations,
+            }
+        if isinstance(pool, QueuePool):
+            stats.update(
+                size=pool.size(),
+                idle=pool.checkedin(),
+                overflow=pool.overflow(),
+                timeout=pool.timeout(),
+            )
+        return stats
+
+def init_pool_metrics(app):
+    with app.app_context():
+        stats = PoolStats(db.engine)
+    stats.attach()
+    app.extensions["pool_stats"] = stats
+    return stats
+
+def pool_stats(app) -> dict:
+    return app.extensions["pool_stats"].snapshot()
@@ -0,0 +1,258 @@
+import csv
+from datetime import datetime
+from io import StringIO
+from itertools import chain
+from tempfile import TemporaryFile
+from zoneinfo import ZoneInfo
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import select, text
+
+from .extensions import db
+
+TABLES = ["Users", "Records", "Admins"]
+
+# typed columnar formats: format -> (extension, mimetype)
+COLUMNAR_FORMATS = {
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+    "arrow": ("arrow", "application/vnd.apache.arrow.file"),
+}
+FORMATS = ["csv", "excel", "sql", "copy", *COLUMNAR_FORMATS]
+
+# SQL dump formats and the pseudo-table that dumps the whole database
+DUMP_FORMATS = ["sql", "copy"]
+DUMP_ALL = "All"
+
+QUERIES = {
+    "Users": "SELECT account, name, password_hash, points FROM users",
+    "Records": """
+        SELECT id, user_account, (time AT TIME ZONE 'Asia/Taipei') AS time,
+            type, amount, reason
+        FROM records
+    """,
+    "Admins": "SELECT account FROM admins",
+}
+
+# rows fetched per server-side cursor round-trip
+STREAM_CHUNK = 1000
+
+# rows per multi-row INSERT statement in SQL dumps
+INSERT_BATCH = 500
+
+TAIPEI = ZoneInfo("Asia/Taipei")
+EXCEL_DATETIME_FORMAT = "yyyy-mm-dd hh:mm:ss"
+
+def stream_table(table: str):
+    """Run the export query for `table` on a server-side cursor.
+
+    Returns (columns, partitions) where partitions yields lists of at most
+    STREAM_CHUNK rows, or None when the table is empty.
+    """
+    result = db.session.execute(
+        text(QUERIES[table]).execution_options(yield_per=STREAM_CHUNK)
+    )
+    partitions = result.partitions()
+    first = next(partitions, None)
+    if first is None:
+        result.close()
+        return None
+    return list(result.keys()), chain([first], partitions)
+
+def csv_chunks(columns, partitions):
+    """Encode partitions as CSV text, one chunk per partition, starting
+    with the BOM and header so the download begins right away."""
+    output = StringIO()
+    writer = csv.writer(output)
+
+    output.write("\ufeff")
+    writer.writerow(columns)
+    yield output.getvalue()
+
+    for rows in partitions:
+        output.seek(0)
+        output.truncate()
+        writer.writerows(rows)
+        yield output.getvalue()
+
+def xlsx_file(table: str, columns, partitions):
+    """Write partitions to a temporary XLSX file and return it rewound.
+
+    openpyxl's write-only mode serializes each row as it is appended, so
+    memory stays bounded by one partition rather than the whole table.
+    Timestamps are written as Taipei-local Excel datetimes; other values
+    keep their database types.
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=table)
+    ws.append(columns)
+
+    for rows in partitions:
+        for row in rows:
+            ws.append([_xlsx_cell(ws, value) for value in row])
+
+    output = TemporaryFile()
+    wb.save(output)
+    output.seek(0)
+    return output
+
+def _xlsx_cell(ws, value):
+    if not isinstance(value, datetime):
+        return value
+    # Excel has no time zones; store the wall-clock time in Taipei
+    if value.tzinfo is not None:
+        value = value.astimezone(TAIPEI).replace(tzinfo=None)
+    cell = WriteOnlyCell(ws, value=value)
+    cell.number_format = EXCEL_DATETIME_FORMAT
+    return cell
+
+# ---------------- SQL dumps ----------------
+def dump_tables(table: str):
+    """Tables to dump for an export choice, parents before children."""
+    if table == DUMP_ALL:
+        return list(db.metadata.sorted_tables)
+    return [db.metadata.tables[table.lower()]]
+
+def dump_chunks(tables, format_: str):
+    """Stream a restorable dump of `tables` in one transaction.
+
+    Rows come off the export cursor partition by partition and are rendered
+    directly into multi-row INSERT statements ("sql") or PostgreSQL
+    COPY ... FROM stdin blocks ("copy"); nothing is compiled per row.
+    """
+    postgres = db.engine.dialect.name == "postgresql"
+    yield "BEGIN;\n"
+
+    for table in tables:
+        name = f'"{table.name}"'
+        columns = ", ".join(f'"{c.name}"' for c in table.columns)
+        result = db.session.execute(
+            select(table).execution_options(yield_per=STREAM_CHUNK)
+        )
+
+        if format_ == "copy":
+            yield f"COPY {name} ({columns}) FROM stdin;\n"
+            for rows in result.partitions():
+                yield "".join("\t".join(_copy_value(v) for v in row) + "\n" for row in rows)
+            yield "\\.\n"
+        else:
+            for rows in result.partitions():
+                for i in range(0, len(rows), INSERT_BATCH):
+                    values = ",\n".join(
+                        "(" + ", ".join(_sql_literal(v) for v in row) + ")"
+                        for row in rows[i:i + INSERT_BATCH]
+                    )
+                    yield f"INSERT INTO {name} ({columns}) VALUES\n{values};\n"
+
+        # restored explicit ids leave serial sequences behind; is_called
+        # false makes the next id MAX + 1, and 1 for an empty table
+        serial = table.autoincrement_column
+        if serial is not None and (postgres or format_ == "copy"):
+            yield (
+                f"SELECT setval(pg_get_serial_sequence('{table.name}', '{serial.name}'), "
+                f"COALESCE(MAX(\"{serial.name}\"), 0) + 1, false) FROM {name};\n"
+            )
+
+    yield "COMMIT;\n"
+
+def _sql_literal(value) -> str:
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, datetime):
+        value = value.isoformat(sep=" ")
+    return "'" + str(value).replace("'", "''") + "'"
+
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+def _copy_value(value) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    return str(value).translate(_COPY_ESCAPES)
+
+# ---------------- Columnar (Parquet / Arrow IPC) ----------------
+# rows per Parquet row group / Arrow record batch
+ROW_GROUP_SIZE = 64_000
+
+# the same columns as QUERIES, with types the readers can keep
+COLUMNAR_COLUMNS = {
+    "Users": [("account", "string"), ("name", "string"), ("password_hash", "string"), ("points", "int32")],
+    "Records": [
+        ("id", "int32"), ("user_account", "dictionary"), ("time", "timestamp"),
+        ("type", "dictionary"), ("amount", "int32"), ("reason", "string"),
+    ],
+    "Admins": [("account", "string")],
+}
+
+def _arrow_type(kind: str):
+    return {
+        "string": pa.string(),
+        "int32": pa.int32(),
+        # stored as UTC instants, shown in Taipei time by readers
+        "timestamp": pa.timestamp("us", tz="Asia/Taipei"),
+        # few distinct values repeated on every row
+        "dictionary": pa.dictionary(pa.int32(), pa.string()),
+    }[kind]
+
+def columnar_file(table: str, format_: str, output=None):
+    """Write `table` as Parquet or an Arrow IPC file to the binary file
+    `output`, or to a temporary file returned rewound. Each row group
+    (record batch) holds ROW_GROUP_SIZE rows taken off the export cursor,
+    so memory stays bounded by one group.
+
+    Dictionary columns share one vocabulary that only grows, so each
+    batch's dictionary extends the previous one: the IPC file format
+    accepts such deltas but not replacements.
+    """
+    columns = COLUMNAR_COLUMNS[table]
+    schema = pa.schema([(name, _arrow_type(kind)) for name, kind in columns])
+    source = db.metadata.tables[table.lower()]
+    result = db.session.execute(
+        select(*(source.c[name] for name, _ in columns)).execution_options(yield_per=STREAM_CHUNK)
+    )
+    vocabularies = {name: {} for name, kind in columns if kind == "dictionary"}
+    rewind = output is None
+    if rewind:
+        output = TemporaryFile()
+
+    if format_ == "parquet":
+        writer = pq.ParquetWriter(output, schema, compression="zstd")
+    else:
+        options = pa.ipc.IpcWriteOptions(compression="zstd", emit_dictionary_deltas=True)
+        writer = pa.ipc.new_file(output, schema, options=options)
+
+    with writer:
+        group = []
+        for rows in result.partitions():
+            group.extend(rows)
+            if len(group) >= ROW_GROUP_SIZE:
+                writer.write_batch(_record_batch(schema, group[:ROW_GROUP_SIZE], vocabularies))
+                del group[:ROW_GROUP_SIZE]
+        if group:
+            writer.write_batch(_record_batch(schema, group, vocabularies))
+    if rewind:
+        output.seek(0)
+    return output
+
+def _record_batch(schema, rows, vocabularies):
+    arrays = []
+    for field, values in zip(schema, zip(*rows)):
+        vocabulary = vocabularies.get(field.name)
+        if vocabulary is None:
+            # naive datetimes (SQLite) are taken as UTC
+            arrays.append(pa.array(values, type=field.type))
+            continue
+        indices = pa.array(
+            [None if v is None else vocabulary.setdefault(v, len(vocabulary)) for v in values],
+            type=pa.int32(),
+        )
+        arrays.append(pa.DictionaryArray.from_arrays(indices, pa.array(list(vocabulary), type=pa.string())))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
@@ -0,0 +1,173 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, render_template
+from markupsafe import Markup
+
+from .leaderboard import leaderboard_query, sort_keys
+from .pagination import cached_count, keyset_page
+from . import versions
+
+# Rendered fragments of the admin leaderboard, keyed on everything the
+# fragment depends on, including the "users" data version: a cached entry
+# can never be served after the users table changed. Write handlers also
+# call invalidate_fragments() after committing, which frees the entries
+# of this worker (memory) or of every worker (sqlite) right away.
+#
+# LEADERBOARD_CACHE:
+#   memory  LRU dict per worker (default)
+#   sqlite  LRU table in a local SQLite file shared by the workers
+#   off     no caching
+CACHE_BACKENDS = ("memory", "sqlite", "off")
+
+class MemoryCache:
+    """LRU of JSON-able values capped by entry count and total bytes."""
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> (size, value)
+        self._bytes = 0
+
+    def get(self, key: str):
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit is None:
+                return None
+            self._entries.move_to_end(key)
+            return hit[1]
+
+    def set(self, key: str, value):
+        size = len(json.dumps(value))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old:
+                self._bytes -= old[0]
+            self._entries[key] = (size, value)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+class SQLiteCache:
+    """The same LRU in a SQLite file, so gunicorn workers share entries."""
+
+    def __init__(self, path: str, max_entries: int, max_bytes: int):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS fragments ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " size INTEGER NOT NULL, used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_fragments_used ON fragments (used)")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str):
+        conn = self._connect()
+        row = conn.execute("SELECT value FROM fragments WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE fragments SET used = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def set(self, key: str, value):
+        data = json.dumps(value)
+        if len(data) > self.max_bytes:
+            return
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO fragments (key, value, size, used) VALUES (?, ?, ?, ?)",
+                (key, data, len(data), time.time()),
+            )
+            # least recently used first: drop everything past either cap
+            conn.execute(
+                "DELETE FROM fragments WHERE key IN ("
+                " SELECT key FROM ("
+                "  SELECT key, ROW_NUMBER() OVER w AS n, SUM(size) OVER w AS running"
+                "  FROM fragments WINDOW w AS (ORDER BY used DESC))"
+                " WHERE n > ? OR running > ?)",
+                (self.max_entries, self.max_bytes),
+            )
+
+    def clear(self):
+        self._connect().execute("DELETE FROM fragments")
+
+def make_cache(config):
+    backend = config["LEADERBOARD_CACHE"]
+    if backend not in CACHE_BACKENDS:
+        raise ValueError(f"LEADERBOARD_CACHE must be one of {', '.join(CACHE_BACKENDS)}, got {backend!r}")
+    entries, size = config["LEADERBOARD_CACHE_ENTRIES"], config["LEADERBOARD_CACHE_BYTES"]
+    if backend == "memory":
+        return MemoryCache(entries, size)
+    if backend == "sqlite":
+        return SQLiteCache(config["LEADERBOARD_CACHE_PATH"], entries, size)
+    return None
+
+def init_fragment_cache(app):
+    app.extensions["fragment_cache"] = make_cache(app.config)
+
+def invalidate_fragments():
+    cache = current_app.extensions["fragment_cache"]
+    if cache is not None:
+        cache.clear()
+
+# ---------------- Leaderboard ----------------
+def leaderboard_fragment(viewer: str, search: str, sort: str, per_page: int,
+                         after=None, before=None, last=False) -> dict:
+    """The admin user table for one page: {"html", "total", "rows",
+    "next_cursor", "prev_cursor"}, rendered once per data version."""
+    cache = current_app.extensions["fragment_cache"]
+    version = versions.current("users")["users"]
+    key = json.dumps(["leaderboard", version, viewer, search, sort, per_page, after, before, last])
+    if cache is not None:
+        hit = cache.get(key)
+        if hit is not None:
+            return {**hit, "html": Markup(hit["html"])}
+
+    query = leaderboard_query(search)
+    columns, descending = sort_keys(sort)
+    page = keyset_page(query, sort, columns, descending, per_page,
+                       after=after, before=before, last=last)
+    fragment = {
+        "total": cached_count(("users", search, version), query),
+        "rows": [list(row) for row in page.items],
+        "next_cursor": page.next_cursor,
+        "prev_cursor": page.prev_cursor,
+    }
+    fragment["html"] = Markup(render_template(
+        "_leaderboard.html",
+        all_users=fragment["rows"],
+        total=fragment["total"],
+        next_cursor=page.next_cursor,
+        prev_cursor=page.prev_cursor,
+        search=search,
+        sort=sort,
+        viewer=viewer,
+    ))
+    if cache is not None:
+        cache.set(key, {**fragment, "html": str(fragment["html"])})
+    return fragment
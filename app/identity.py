@@ -0,0 +1,63 @@
+import threading
+import time
+from flask import current_app, g, session
+from sqlalchemy import select
+
+from .models.user import User
+from .models.admin import Admin
+from .extensions import db
+from . import versions
+
+def get_current_user():
+    """Session user, looked up at most once per request."""
+    if "current_user" not in g:
+        account = session.get("account")
+        g.current_user = db.session.get(User, account) if account else None
+    return g.current_user
+
+class AdminRoster:
+    """Per-worker copy of the admin accounts.
+
+    Only compares the "admins" data version once per ADMIN_ROSTER_TTL; the
+    roster itself is reloaded when toggle_admin (or any other writer) has
+    bumped that version.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._accounts = None
+        self._version = None
+        self._checked = 0.0
+
+    def accounts(self) -> frozenset:
+        now = time.monotonic()
+        with self._lock:
+            if self._accounts is not None and now - self._checked < self.ttl:
+                return self._accounts
+
+        version = versions.current("admins")["admins"]
+        with self._lock:
+            if self._accounts is None or self._version != version:
+                self._accounts = frozenset(db.session.scalars(select(Admin.account)))
+                self._version = version
+            self._checked = now
+            return self._accounts
+
+    def invalidate(self):
+        with self._lock:
+            self._accounts = None
+
+def admin_accounts() -> frozenset:
+    """Accounts holding admin rights."""
+    return current_app.extensions["admin_roster"].accounts()
+
+def invalidate_admin_roster():
+    """Drop this worker's roster; other workers follow via the version bump."""
+    current_app.extensions["admin_roster"].invalidate()
+
+def is_admin(user: User) -> bool:
+    return user.account in admin_accounts()
+
+def init_admin_roster(app):
+    app.extensions["admin_roster"] = AdminRoster(app.config["ADMIN_ROSTER_TTL"])
@@ -0,0 +1,72 @@
+import csv
+import io
+import os
+from collections import namedtuple
+from datetime import datetime
+from zipfile import BadZipFile
+from openpyxl import load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+
+# Row readers shared by the admin uploads and their CLI counterparts.
+# Rows are yielded one at a time so large sheets are never held in memory.
+
+UPLOAD_FORMATS = (".csv", ".xlsx")
+
+# one rejected row of an upload, for the per-row error report
+RowError = namedtuple("RowError", ["line", "account", "error"])
+
+class ImportFileError(ValueError):
+    """The upload can't be read at all (as opposed to a bad row)."""
+
+def _cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)  # Excel stores accounts typed as numbers as floats
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value).strip()
+
+def _xlsx_lines(stream):
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        for line, row in enumerate(workbook.active.iter_rows(values_only=True), start=1):
+            yield line, [_cell(v) for v in row]
+    finally:
+        workbook.close()
+
+def _csv_lines(stream):
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    reader = csv.reader(text)
+    for row in reader:
+        yield reader.line_num, [v.strip() for v in row]
+
+def read_rows(filename: str, stream, columns, optional=()):
+    """Yield (line number, {column: text}) for each non-blank row of a CSV
+    or XLSX upload whose header names `columns` (in any order, any case).
+
+    Raises ImportFileError for an unknown extension, an unreadable file or
+    a header missing one of `columns`.
+    """
+    ext = os.path.splitext(filename or "")[1].lower()
+    if ext not in UPLOAD_FORMATS:
+        raise ImportFileError("只接受 CSV 或 XLSX 檔案。")
+
+    try:
+        lines = _xlsx_lines(stream) if ext == ".xlsx" else _csv_lines(stream)
+        _, header = next(lines, (0, []))
+        header = [h.lower() for h in header]
+        missing = [c for c in columns if c not in header]
+        if missing:
+            raise ImportFileError(f"缺少欄位：{', '.join(missing)}")
+        positions = {c: header.index(c) for c in (*columns, *optional) if c in header}
+
+        for line, row in lines:
+            if not any(row):
+                continue
+            yield line, {c: row[i] if i < len(row) else "" for c, i in positions.items()}
+    except ImportFileError:
+        raise
+    except (UnicodeDecodeError, csv.Error, OSError, KeyError, ValueError,
+            BadZipFile, InvalidFileException) as e:
+        raise ImportFileError(f"無法讀取檔案：{e}") from e
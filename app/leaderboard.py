@@ -0,0 +1,39 @@
+from sqlalchemy import select
+
+from .models.user import User
+from .search import user_filter
+
+# sort key -> (column, descending); every key is backed by an index ending in
+# User.account so ties are broken without a filesort
+SORTS = {
+    "account_asc": (User.account, False),
+    "account_desc": (User.account, True),
+    "name_asc": (User.name, False),
+    "name_desc": (User.name, True),
+    "points_asc": (User.points, False),
+    "points_desc": (User.points, True),
+}
+DEFAULT_SORT = "account_asc"
+
+def sort_keys(sort: str):
+    """Keyset columns and direction for a sort option."""
+    column, descending = SORTS.get(sort, SORTS[DEFAULT_SORT])
+    if column is User.account:
+        return [User.account], descending
+    return [column, User.account], descending
+
+def leaderboard_query(search: str = ""):
+    """Leaderboard rows (account, name, points, count) read from the
+    per-user columns, so a page never touches the records table.
+    Ordering is left to the pager, see sort_keys()."""
+    query = select(
+        User.account,
+        User.name,
+        User.points,
+        User.record_count.label("count"),
+    )
+
+    if search:
+        query = query.filter(user_filter(search))
+
+    return query
@@ -0,0 +1,125 @@
+from collections import namedtuple
+from sqlalchemy import and_, bindparam, func, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from .models.user import User
+from .models.record import Record
+from .models.checkpoint import PointsCheckpoint
+from .extensions import db
+from . import versions
+
+# users.points / record_count are maintained incrementally by the write
+# handlers. A checkpoint stores what a user's records with id <= record_id
+# add up to, so reconciling only has to read the records written after it.
+
+Drift = namedtuple("Drift", ["account", "points", "expected_points", "record_count", "expected_count"])
+
+def adjust_checkpoint(account: str, record_id: int, points: int, count: int = 0):
+    """Keep a checkpoint exact when a record it already covers is edited
+    (points = amount delta) or deleted (points = -amount, count = -1)."""
+    db.session.execute(
+        update(PointsCheckpoint)
+        .where(
+            PointsCheckpoint.user_account == account,
+            PointsCheckpoint.record_id >= record_id,
+        )
+        .values(
+            balance=PointsCheckpoint.balance + points,
+            record_count=PointsCheckpoint.record_count + count,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+def _balances_query():
+    """Per user: stored columns, checkpoint, and the records written since."""
+    since = func.coalesce(PointsCheckpoint.record_id, 0)
+    return (
+        select(
+            User.account,
+            User.points,
+            User.record_count,
+            (func.coalesce(PointsCheckpoint.balance, 0)
+                + func.coalesce(func.sum(Record.amount), 0)).label("expected_points"),
+            (func.coalesce(PointsCheckpoint.record_count, 0)
+                + func.count(Record.id)).label("expected_count"),
+            func.coalesce(func.max(Record.id), since).label("last_id"),
+            PointsCheckpoint.record_id.label("checkpoint_id"),
+        )
+        .outerjoin(PointsCheckpoint, PointsCheckpoint.user_account == User.account)
+        .outerjoin(Record, and_(Record.user_account == User.account, Record.id > since))
+        .group_by(
+            User.account, User.points, User.record_count,
+            PointsCheckpoint.balance, PointsCheckpoint.record_count, PointsCheckpoint.record_id,
+        )
+    )
+
+def verify() -> list:
+    """Users whose stored points or record count disagree with their records."""
+    return [
+        Drift(row.account, row.points, row.expected_points, row.record_count, row.expected_count)
+        for row in db.session.execute(_balances_query())
+        if row.points != row.expected_points or row.record_count != row.expected_count
+    ]
+
+def rebuild() -> list:
+    """Repair drifted users in bulk and advance every checkpoint to the
+    latest record. Returns the drifts that were repaired.
+
+    On PostgreSQL, record ids come from a sequence before commit, so a
+    record with a lower id than the newest visible one may still be
+    uncommitted; a checkpoint moved past it would never count it. Writers
+    to records are locked out until the checkpoints commit (the lock waits
+    for the ones in flight), so every id below the checkpoints is final.
+    SQLite has a single writer and no such gap.
+    """
+    if db.engine.dialect.name == "postgresql":
+        db.session.execute(text("LOCK TABLE records IN SHARE ROW EXCLUSIVE MODE"))
+    rows = db.session.execute(_balances_query()).all()
+    drifts = [
+        Drift(row.account, row.points, row.expected_points, row.record_count, row.expected_count)
+        for row in rows
+        if row.points != row.expected_points or row.record_count != row.expected_count
+    ]
+
+    if drifts:
+        # apply the difference rather than the value, so a handler committing
+        # meanwhile is not overwritten
+        users = User.__table__
+        db.session.execute(
+            update(users)
+            .where(users.c.account == bindparam("b_account"))
+            .values(
+                points=users.c.points + bindparam("b_points"),
+                record_count=users.c.record_count + bindparam("b_count"),
+            ),
+            [{"b_account": d.account,
+              "b_points": d.expected_points - d.points,
+              "b_count": d.expected_count - d.record_count}
+             for d in drifts],
+        )
+        versions.bump("users")
+
+    advanced = [
+        {"user_account": row.account, "record_id": row.last_id,
+         "balance": row.expected_points, "record_count": row.expected_count}
+        for row in rows
+        if row.last_id and row.last_id != row.checkpoint_id
+    ]
+    if advanced:
+        dialect = postgresql if db.engine.dialect.name == "postgresql" else sqlite
+        stmt = dialect.insert(PointsCheckpoint)
+        db.session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[PointsCheckpoint.user_account],
+                set_={
+                    "record_id": stmt.excluded.record_id,
+                    "balance": stmt.excluded.balance,
+                    "record_count": stmt.excluded.record_count,
+                    "time": func.now(),
+                },
+            ),
+            advanced,
+        )
+
+    db.session.commit()
+    return drifts
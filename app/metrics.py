@@ -0,0 +1,206 @@
+import heapq
+import threading
+import time
+from collections import defaultdict
+from flask import has_request_context, request, request_finished, request_started
+from sqlalchemy import event
+
+from .extensions import db
+from .dbpool import pool_stats
+
+# Per-worker request metrics for the main and api blueprints: latency histogram,
+# SQL statement count, time spent in the database and response bytes per
+# endpoint, rendered in the Prometheus text format by /metrics. Like
+# /admin/pool, every gunicorn worker answers with its own numbers.
+
+PREFIX = "points"
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BLUEPRINTS = ("main", "api")
+SLOW_STATEMENTS = 5     # statements shown per slow request
+STATEMENT_PREVIEW = 500
+
+ENVIRON_KEY = "points.metrics"
+
+class _Request:
+    """What one request has done so far. Kept in the WSGI environ rather
+    than on g, which a streamed body no longer shares with the view."""
+
+    __slots__ = ("start", "statements", "db_seconds", "slowest", "bytes")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.slowest = []   # min-heap of (seconds, n, statement)
+        self.bytes = 0
+
+def _state():
+    # background writers have an app context but never a request
+    return request.environ.get(ENVIRON_KEY) if has_request_context() else None
+
+class RequestMetrics:
+    def __init__(self, app):
+        self.app = app
+        self.slow_seconds = app.config["SLOW_REQUEST_SECONDS"]
+        self._lock = threading.Lock()
+        self.requests = defaultdict(int)            # (endpoint, status) -> count
+        self.histograms = {}                        # endpoint -> bucket counts
+        self.seconds = defaultdict(float)
+        self.statements = defaultdict(int)
+        self.db_seconds = defaultdict(float)
+        self.response_bytes = defaultdict(int)
+
+    def attach(self, engine):
+        @event.listens_for(engine, "before_cursor_execute")
+        def _before(conn, cursor, statement, parameters, context, executemany):
+            if _state() is not None:
+                conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def _after(conn, cursor, statement, parameters, context, executemany):
+            state = _state()
+            starts = conn.info.get("query_start")
+            if state is None or not starts:
+                return
+            elapsed = time.perf_counter() - starts.pop()
+            state.statements += 1
+            state.db_seconds += elapsed
+            if self.slow_seconds:
+                entry = (elapsed, state.statements, statement)
+                if len(state.slowest) < SLOW_STATEMENTS:
+                    heapq.heappush(state.slowest, entry)
+                else:
+                    heapq.heappushpop(state.slowest, entry)
+
+        request_started.connect(self._started, self.app)
+        request_finished.connect(self._finished, self.app)
+
+    def _started(self, sender, **extra):
+        if request.blueprint in BLUEPRINTS:
+            request.environ[ENVIRON_KEY] = _Request()
+
+    def _finished(self, sender, response, **extra):
+        state = request.environ.get(ENVIRON_KEY)
+        if state is None:
+            return
+        endpoint, status = request.endpoint, response.status_code
+
+        # streamed exports keep running SQL after the view returns, so the
+        # request is only measured once the body has been sent
+        if response.is_streamed:
+            response.response = self._counting(response.response, state)
+            response.call_on_close(lambda: self._observe(endpoint, status, state))
+        else:
+            state.bytes = response.content_length or 0
+            self._observe(endpoint, status, state)
+
+    @staticmethod
+    def _counting(body, state):
+        for chunk in body:
+            state.bytes += len(chunk)
+            yield chunk
+
+    def _observe(self, endpoint, status, state):
+        elapsed = time.perf_counter() - state.start
+        with self._lock:
+            self.requests[endpoint, status] += 1
+            counts = self.histograms.setdefault(endpoint, [0] * len(BUCKETS))
+            for i, bound in enumerate(BUCKETS):
+                if elapsed <= bound:
+                    counts[i] += 1
+            self.seconds[endpoint] += elapsed
+            self.statements[endpoint] += state.statements
+            self.db_seconds[endpoint] += state.db_seconds
+            self.response_bytes[endpoint] += state.bytes
+
+        if self.slow_seconds and elapsed >= self.slow_seconds:
+            slowest = sorted(state.slowest, reverse=True)
+            self.app.logger.warning(
+                "slow request %s %d: %.3fs, %d statements, %.3fs in the database%s",
+                endpoint, status, elapsed, state.statements, state.db_seconds,
+                "".join(
+                    f"\n  {seconds:.3f}s #{n}: {' '.join(statement.split())[:STATEMENT_PREVIEW]}"
+                    for seconds, n, statement in slowest
+                ),
+            )
+
+    def render(self) -> list:
+        with self._lock:
+            requests = dict(self.requests)
+            histograms = {k: list(v) for k, v in self.histograms.items()}
+            seconds = dict(self.seconds)
+            statements = dict(self.statements)
+            db_seconds = dict(self.db_seconds)
+            response_bytes = dict(self.response_bytes)
+
+        lines = [
+            f"# HELP {PREFIX}_http_requests_total Requests handled, by endpoint and status.",
+            f"# TYPE {PREFIX}_http_requests_total counter",
+        ]
+        lines += [
+            f'{PREFIX}_http_requests_total{{endpoint="{endpoint}",status="{status}"}} {count}'
+            for (endpoint, status), count in sorted(requests.items())
+        ]
+
+        name = f"{PREFIX}_http_request_duration_seconds"
+        lines += [
+            f"# HELP {name} Request latency, until the last byte is sent.",
+            f"# TYPE {name} histogram",
+        ]
+        for endpoint, counts in sorted(histograms.items()):
+            total = sum(c for (e, _), c in requests.items() if e == endpoint)
+            lines += [
+                f'{name}_bucket{{endpoint="{endpoint}",le="{bound}"}} {count}'
+                for bound, count in zip(BUCKETS, counts)
+            ]
+            lines += [
+                f'{name}_bucket{{endpoint="{endpoint}",le="+Inf"}} {total}',
+                f'{name}_sum{{endpoint="{endpoint}"}} {seconds[endpoint]:.6f}',
+                f'{name}_count{{endpoint="{endpoint}"}} {total}',
+            ]
+
+        for metric, help_, values in (
+            ("db_statements_total", "SQL statements executed by requests.", statements),
+            ("db_seconds_total", "Time requests spent executing SQL.", db_seconds),
+            ("http_response_bytes_total", "Response body bytes sent.", response_bytes),
+        ):
+            lines += [f"# HELP {PREFIX}_{metric} {help_}", f"# TYPE {PREFIX}_{metric} counter"]
+            lines += [
+                f'{PREFIX}_{metric}{{endpoint="{endpoint}"}} {value}'
+                for endpoint, value in sorted(values.items())
+            ]
+        return lines
+
+def _pool_lines(stats: dict) -> list:
+    lines = []
+    for key, kind, help_ in (
+        ("checkouts", "counter", "Connections checked out of the pool."),
+        ("checkout_wait_seconds", "counter", "Time spent waiting to check out a connection."),
+        ("checkout_timeouts", "counter", "Checkouts that gave up after the pool timeout."),
+        ("max_checkout_wait_seconds", "gauge", "Longest wait to check out a connection."),
+        ("connects", "counter", "New database connections opened."),
+        ("connect_seconds", "counter", "Time spent opening connections."),
+        ("invalidations", "counter", "Connections invalidated."),
+        ("checked_out", "gauge", "Connections currently checked out."),
+        ("peak_checked_out", "gauge", "Most connections checked out at once."),
+        ("size", "gauge", "Configured pool size."),
+        ("idle", "gauge", "Idle connections in the pool."),
+        ("overflow", "gauge", "Connections opened beyond the pool size."),
+    ):
+        if key not in stats:
+            continue    # NullPool has no size/idle/overflow
+        name = f"{PREFIX}_db_pool_{key}" + ("_total" if kind == "counter" else "")
+        lines += [f"# HELP {name} {help_}", f"# TYPE {name} {kind}", f"{name} {stats[key]}"]
+    return lines
+
+def render_metrics(app) -> str:
+    lines = app.extensions["request_metrics"].render() + _pool_lines(pool_stats(app))
+    return "\n".join(lines) + "\n"
+
+def init_request_metrics(app):
+    metrics = RequestMetrics(app)
+    with app.app_context():
+        for engine in db.engines.values():     # the primary and a read replica, if any
+            metrics.attach(engine)
+    app.extensions["request_metrics"] = metrics
+    return metrics
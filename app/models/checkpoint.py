@@ -0,0 +1,17 @@
+from sqlalchemy.sql import func
+from ..extensions import db
+
+class PointsCheckpoint(db.Model):
+    __tablename__ = "points_checkpoints"
+
+    user_account = db.Column(db.String(9), db.ForeignKey("users.account", ondelete="CASCADE"), primary_key=True)
+
+    # balance and record count of the user's records with id <= record_id
+    record_id = db.Column(db.Integer, nullable=False)
+    balance = db.Column(db.Integer, nullable=False)
+    record_count = db.Column(db.Integer, nullable=False)
+
+    time = db.Column(db.DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<PointsCheckpoint {self.user_account} #{self.record_id} balance={self.balance}>"
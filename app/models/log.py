@@ -1,3 +1,5 @@
+from datetime import datetime, timezone
+from sqlalchemy import Index
 from sqlalchemy.sql import func
 from ..extensions import db
 
@@ -7,7 +9,13 @@ class Log(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_account = db.Column(db.String(9), db.ForeignKey("users.account", ondelete="CASCADE"), nullable=False)
 
-    time = db.Column(db.DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # set client-side too so SQLite stores the same format as bound cursor values
+    time = db.Column(
+        db.DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        server_default=func.now(),
+        nullable=False,
+    )
     
     url = db.Column(db.Text, nullable=False)
     log = db.Column(db.Text)
@@ -19,5 +27,16 @@ class Log(db.Model):
         passive_deletes=True
     )
 
+    __table_args__ = (
+        # newest-first paging and retention range deletes
+        Index("ix_logs_time_id", "time", "id"),
+        Index("ix_logs_user_account", "user_account"),
+        # substring search, see app/search.py
+        Index(
+            "ix_logs_log_trgm", "log",
+            postgresql_using="gin", postgresql_ops={"log": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
+
     def __repr__(self):
         return f"<Log {self.user_account} : {self.log}>"
\ No newline at end of file
@@ -1,4 +1,5 @@
-from sqlalchemy import CheckConstraint
+from datetime import datetime, timezone
+from sqlalchemy import CheckConstraint, Index
 from sqlalchemy.sql import func
 from ..extensions import db
 
@@ -9,7 +10,13 @@ class Record(db.Model):
     user_account = db.Column(db.String(9), db.ForeignKey("users.account", ondelete="CASCADE"), nullable=False)
     author_account = db.Column(db.String(9), db.ForeignKey("users.account"), nullable=False)
 
-    time = db.Column(db.DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # set client-side too so SQLite stores the same format as bound cursor values
+    time = db.Column(
+        db.DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        server_default=func.now(),
+        nullable=False,
+    )
     
     # type: "add" or "remove"
     type = db.Column(db.String(7), nullable=False)
@@ -33,6 +40,11 @@ class Record(db.Model):
     __table_args__ = (
         CheckConstraint("amount != 0"),
         CheckConstraint("type IN ('add','remove')"),
+        # a member's history, newest first
+        Index("ix_records_user_account_time", "user_account", "time", "id"),
+        Index("ix_records_author_account", "author_account"),
+        # the ledger's records after a checkpoint
+        Index("ix_records_user_account_id", "user_account", "id"),
     )
 
     def __repr__(self):
@@ -0,0 +1,37 @@
+from sqlalchemy import Index
+from ..extensions import db
+
+# Aggregates of records, maintained by app/rollups.py on every Record write
+# and rebuilt by `flask rollups backfill`.
+
+class DailyPoints(db.Model):
+    __tablename__ = "daily_points"
+
+    # Taipei calendar day of the record's time
+    day = db.Column(db.Date, primary_key=True)
+    type = db.Column(db.String(7), primary_key=True)
+    author_account = db.Column(db.String(9), primary_key=True)
+
+    records = db.Column(db.Integer, nullable=False, default=0)
+    points = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<DailyPoints {self.day} {self.type} {self.author_account} {self.points}>"
+
+class SemesterPoints(db.Model):
+    __tablename__ = "semester_points"
+
+    # e.g. "2025-1" (Aug-Jan) or "2025-2" (Feb-Jul), see rollups.semester_of
+    semester = db.Column(db.String(6), primary_key=True)
+    user_account = db.Column(db.String(9), db.ForeignKey("users.account", ondelete="CASCADE"), primary_key=True)
+
+    records = db.Column(db.Integer, nullable=False, default=0)
+    points = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        # members at or above the milestone in a semester
+        Index("ix_semester_points_semester_points", "semester", "points"),
+    )
+
+    def __repr__(self):
+        return f"<SemesterPoints {self.semester} {self.user_account} {self.points}>"
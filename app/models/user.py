@@ -1,4 +1,5 @@
 from datetime import datetime
+from sqlalchemy import Index
 from werkzeug.security import generate_password_hash, check_password_hash
 from ..extensions import db
 
@@ -9,6 +10,8 @@ class User(db.Model):
     name = db.Column(db.String(64), nullable=False)
     password_hash = db.Column(db.String(256), nullable=False)
     points = db.Column(db.Integer, default=0, nullable=False)
+    # number of records held by this user, maintained alongside points
+    record_count = db.Column(db.Integer, default=0, server_default="0", nullable=False)
     
     records = db.relationship(
         "Record",
@@ -27,6 +30,21 @@ class User(db.Model):
         cascade="all, delete-orphan"
     )
 
+    __table_args__ = (
+        # leaderboard sort orders, see app/leaderboard.py
+        Index("ix_users_name_account", "name", "account"),
+        Index("ix_users_points_account", "points", "account"),
+        # substring search, see app/search.py
+        Index(
+            "ix_users_account_trgm", "account",
+            postgresql_using="gin", postgresql_ops={"account": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_users_name_trgm", "name",
+            postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
+
     def set_password(self, password: str):
         self.password_hash = generate_password_hash(password)
 
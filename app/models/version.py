@@ -0,0 +1,11 @@
+from ..extensions import db
+
+class DataVersion(db.Model):
+    __tablename__ = "data_versions"
+
+    # one counter per cached data set, e.g. "admins"
+    key = db.Column(db.String(32), primary_key=True)
+    version = db.Column(db.Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<DataVersion {self.key}={self.version}>"
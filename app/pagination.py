@@ -0,0 +1,112 @@
+import json
+import time
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import namedtuple
+from datetime import datetime
+from sqlalchemy import DateTime, func, literal, select, tuple_
+
+from .extensions import db
+
+Page = namedtuple("Page", ["items", "next_cursor", "prev_cursor"])
+
+COUNT_TTL = 30          # seconds a cached total stays valid
+COUNT_CACHE_SIZE = 256
+
+_counts = {}
+
+# ---------------- Cursors ----------------
+def encode_cursor(kind: str, values) -> str:
+    payload = json.dumps(
+        {"k": kind, "v": [v.isoformat() if isinstance(v, datetime) else v for v in values]},
+        separators=(",", ":"),
+    )
+    return urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(token: str, kind: str, columns):
+    """Decode a token made by encode_cursor, or None if it is missing,
+    malformed, or was issued for another ordering."""
+    if not token:
+        return None
+    try:
+        payload = json.loads(urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        if payload["k"] != kind or len(payload["v"]) != len(columns):
+            return None
+        return [_cursor_value(c, v) for c, v in zip(columns, payload["v"])]
+    except (ValueError, KeyError, TypeError, NotImplementedError):
+        return None
+
+def _cursor_value(column, value):
+    """`value` as the column's Python type; tokens are user input, so
+    anything else (a list, a dict, null) raises TypeError."""
+    if isinstance(column.type, DateTime):
+        return datetime.fromisoformat(value)
+    python_type = column.type.python_type
+    if not isinstance(value, python_type) or isinstance(value, bool):
+        raise TypeError(f"cursor value {value!r} is not {python_type.__name__}")
+    return value
+
+# ---------------- Keyset pages ----------------
+def keyset_page(query, kind, columns, descending, per_page,
+                after=None, before=None, last=False, scalars=False):
+    """Fetch one page of `query` ordered by `columns` (all in the same
+    direction) starting after/before a cursor, without OFFSET.
+
+    Every page costs one index range scan of per_page + 1 rows; the extra
+    row tells whether another page exists in the scan direction.
+    """
+    after = decode_cursor(after, kind, columns)
+    before = decode_cursor(before, kind, columns) if after is None else None
+    backward = before is not None or (last and after is None)
+
+    cursor = before if backward else after
+    result = db.session.execute(keyset_query(query, columns, descending, per_page, cursor, backward))
+    rows = result.scalars().all() if scalars else result.all()
+    has_more = len(rows) > per_page
+    items = rows[:per_page]
+    if backward:
+        items.reverse()
+
+    def cursor_of(item):
+        return encode_cursor(kind, [getattr(item, c.key) for c in columns])
+
+    if not items:
+        return Page(items, None, None)
+    if backward:
+        return Page(
+            items,
+            cursor_of(items[-1]) if before is not None else None,
+            cursor_of(items[0]) if has_more else None,
+        )
+    return Page(
+        items,
+        cursor_of(items[-1]) if has_more else None,
+        cursor_of(items[0]) if after is not None else None,
+    )
+
+def keyset_query(query, columns, descending, per_page, cursor=None, backward=False):
+    """The statement keyset_page runs: `query` past the decoded `cursor`
+    (before it when `backward`), limited to per_page + 1 rows."""
+    # direction the rows are actually read in
+    desc = descending != backward
+    if cursor is not None:
+        key = tuple_(*columns)
+        bound = tuple_(*[literal(v, c.type) for c, v in zip(columns, cursor)])
+        query = query.filter(key < bound if desc else key > bound)
+    query = query.order_by(*[c.desc() if desc else c.asc() for c in columns])
+    return query.limit(per_page + 1)
+
+# ---------------- Totals ----------------
+def cached_count(key, query, ttl: int = COUNT_TTL) -> int:
+    """Row count of `query`, computed at most once per `ttl` seconds per key."""
+    now = time.monotonic()
+    hit = _counts.get(key)
+    if hit and hit[0] > now:
+        return hit[1]
+
+    total = db.session.execute(
+        select(func.count()).select_from(query.order_by(None).subquery())
+    ).scalar()
+    if len(_counts) >= COUNT_CACHE_SIZE:
+        _counts.clear()
+    _counts[key] = (now + ttl, total)
+    return total
@@ -0,0 +1,101 @@
+from collections import namedtuple
+from itertools import islice
+from sqlalchemy import select
+
+from .models.user import User
+from .extensions import db
+from .batch import clamp_amount_update, write_adjustments
+from .imports import RowError, read_rows
+
+ADJUSTMENT_COLUMNS = ("account", "amount", "reason")
+IMPORT_CHUNK = 2000     # rows validated and written per round
+PREVIEW_ROWS = 50
+MAX_REPORTED_ERRORS = 200
+
+PreviewRow = namedtuple("PreviewRow", ["line", "account", "name", "amount", "reason", "clamped"])
+AdjustmentReport = namedtuple(
+    "AdjustmentReport",
+    ["rows", "accounts", "points", "clamped", "preview", "errors", "error_count", "applied"],
+)
+
+def _parse(row):
+    """(account, amount, reason, clamped) or an error message."""
+    account, reason = row["account"], row["reason"]
+    if not account.isdigit() or len(account) != 9:
+        return "帳號需為 9 位數字。"
+    try:
+        amount = int(row["amount"])
+    except ValueError:
+        return "點數需為整數。"
+    if amount == 0:
+        return "點數不可為 0。"
+    if not reason:
+        return "請填寫原因。"
+    clamped = clamp_amount_update(amount)
+    return account, clamped, reason, clamped != amount
+
+def import_adjustments(author: User, filename: str, stream, dry_run: bool = True,
+                       url: str = "/admin/import_points") -> AdjustmentReport:
+    """Apply the (account, amount, reason) rows of a CSV/XLSX sheet.
+
+    The sheet is read IMPORT_CHUNK rows at a time: each chunk costs one IN
+    lookup for its accounts and, unless this is a dry run, one round of
+    set-based writes (write_adjustments). Everything happens in a single
+    transaction that is only committed when no row was rejected, so a
+    sheet is applied either entirely or not at all and can be fixed and
+    uploaded again.
+    """
+    rows = read_rows(filename, stream, ADJUSTMENT_COLUMNS)
+    total = points = clamped = error_count = 0
+    accounts = set()
+    preview, errors = [], []
+
+    def reject(line, account, error):
+        nonlocal error_count
+        error_count += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append(RowError(line, account, error))
+
+    try:
+        while chunk := list(islice(rows, IMPORT_CHUNK)):
+            parsed = []
+            for line, row in chunk:
+                result = _parse(row)
+                if isinstance(result, str):
+                    reject(line, row["account"], result)
+                else:
+                    parsed.append((line, *result))
+
+            names = dict(db.session.execute(
+                select(User.account, User.name)
+                .where(User.account.in_({account for _, account, *_ in parsed}))
+            ).all()) if parsed else {}
+
+            entries = []
+            for line, account, amount, reason, was_clamped in parsed:
+                if account not in names:
+                    reject(line, account, "找不到帳號。")
+                    continue
+                entries.append((account, amount, reason))
+                total += 1
+                points += amount
+                clamped += was_clamped
+                accounts.add(account)
+                if len(preview) < PREVIEW_ROWS:
+                    preview.append(PreviewRow(line, account, names[account], amount, reason, was_clamped))
+
+            # once a row is rejected nothing will be committed; keep
+            # validating the rest of the sheet but stop writing
+            if not dry_run and not error_count:
+                write_adjustments(author, entries, names, url)
+
+        applied = not dry_run and not error_count and total > 0
+        if applied:
+            db.session.commit()
+        else:
+            db.session.rollback()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return AdjustmentReport(total, len(accounts), points, clamped, preview, sorted(errors), error_count, applied)
@@ -0,0 +1,113 @@
+import threading
+import time
+from flask import current_app, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.sql.dml import UpdateBase
+
+# Optional read replica, configured as the "replica" entry of
+# SQLALCHEMY_BINDS (REPLICA_DATABASE_URL). No model is bound to it: the
+# session below sends a request's reads there only when all of these hold:
+#
+#   - the request is a GET/HEAD of the site or API, or an export
+#   - the client hasn't written anything in the last REPLICA_STICKY_SECONDS
+#     (every POST pins it to the primary, so the redirect after an admin
+#     action shows its own write)
+#   - the replica has caught up with the primary's data versions, checked
+#     at most once per REPLICA_CHECK_INTERVAL per worker
+#
+# Flushes and INSERT/UPDATE/DELETE statements always go to the primary,
+# as does anything outside a request (CLI, audit writer, log purger).
+BIND_KEY = "replica"
+BLUEPRINTS = ("main", "api")
+READ_METHODS = ("GET", "HEAD")
+# non-GET endpoints that only read (the export form posts its choice)
+READ_ENDPOINTS = ("main.export",)
+ROUTE_KEY = "points.replica"
+STICKY_KEY = "primary_until"
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that reads from the replica when the
+    current request was routed there, see init_replica."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and not isinstance(clause, UpdateBase)
+            and has_request_context()
+            and request.environ.get(ROUTE_KEY)
+        ):
+            return self._db.engines[BIND_KEY]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+class ReplicaMonitor:
+    """Per-worker view of whether the replica is current enough to read."""
+
+    def __init__(self, db, interval: float):
+        self.db = db
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._healthy = False
+        self._checked = None
+
+    def healthy(self) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if self._checked is not None and now - self._checked < self.interval:
+                return self._healthy
+            self._checked = now     # other threads keep the old answer meanwhile
+        healthy = self._check()
+        with self._lock:
+            self._healthy = healthy
+        return healthy
+
+    def _check(self) -> bool:
+        """The replica is behind if any data version is older than the
+        primary's; an unreachable replica counts as behind too."""
+        from .models.version import DataVersion     # extensions imports this module
+
+        query = select(DataVersion.key, DataVersion.version)
+        try:
+            with self.db.engines[None].connect() as conn:
+                primary = dict(conn.execute(query).all())
+            with self.db.engines[BIND_KEY].connect() as conn:
+                replica = dict(conn.execute(query).all())
+        except SQLAlchemyError:
+            current_app.logger.warning("read replica unavailable, reading from the primary", exc_info=True)
+            return False
+        behind = [key for key, version in primary.items() if replica.get(key, 0) < version]
+        if behind:
+            current_app.logger.info("read replica behind on %s, reading from the primary", ", ".join(behind))
+        return not behind
+
+def _route_request(monitor: ReplicaMonitor):
+    if request.blueprint not in BLUEPRINTS:
+        return
+    if request.method not in READ_METHODS and request.endpoint not in READ_ENDPOINTS:
+        return
+    if session.get(STICKY_KEY, 0) > time.time():
+        return
+    if monitor.healthy():
+        request.environ[ROUTE_KEY] = True
+
+def _stick_to_primary(response):
+    if (
+        request.blueprint in BLUEPRINTS
+        and request.method not in READ_METHODS
+        and request.endpoint not in READ_ENDPOINTS
+    ):
+        session[STICKY_KEY] = time.time() + current_app.config["REPLICA_STICKY_SECONDS"]
+    return response
+
+def init_replica(app):
+    from .extensions import db
+
+    if BIND_KEY not in app.config.get("SQLALCHEMY_BINDS", {}):
+        app.extensions["replica"] = None
+        return
+    monitor = ReplicaMonitor(db, app.config["REPLICA_CHECK_INTERVAL"])
+    app.before_request(lambda: _route_request(monitor))
+    app.after_request(_stick_to_primary)
+    app.extensions["replica"] = monitor
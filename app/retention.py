@@ -0,0 +1,77 @@
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, select, text
+
+from .models.log import Log
+from .extensions import db
+
+# arbitrary key shared by every worker competing for the purge
+PURGE_LOCK_KEY = 0x6C6F6773
+
+def purge_batch(cutoff: datetime, batch_size: int):
+    """DELETE of the oldest `batch_size` logs from before `cutoff`."""
+    expired = (
+        select(Log.id)
+        .where(Log.time < cutoff)
+        .order_by(Log.time, Log.id)
+        .limit(batch_size)
+        .scalar_subquery()
+    )
+    return delete(Log).where(Log.id.in_(expired))
+
+def purge_expired_logs(retention_days: int, batch_size: int):
+    """Delete logs older than `retention_days`, `batch_size` rows per
+    transaction so no statement holds locks on the whole expired range.
+
+    On PostgreSQL each batch first takes a transaction-level advisory lock,
+    released by its own commit: it never outlives the transaction, even
+    when PgBouncer hands the next statement to another server connection.
+
+    Returns the number of deleted rows, or None when another worker holds
+    the purge lock before anything was deleted.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    batch = purge_batch(cutoff, batch_size)
+
+    deleted = 0
+    while True:
+        with db.engine.begin() as conn:
+            if conn.dialect.name == "postgresql":
+                locked = conn.execute(
+                    text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": PURGE_LOCK_KEY}
+                ).scalar()
+                if not locked:
+                    # another worker took over between batches; it finishes the job
+                    return deleted or None
+            count = conn.execute(batch).rowcount
+        deleted += count
+        if count < batch_size:
+            return deleted
+
+def start_log_purger(app):
+    """Run purge_expired_logs every LOG_PURGE_INTERVAL seconds in a daemon
+    thread. The first run is delayed too, so worker boot never waits on it."""
+    interval = app.config["LOG_PURGE_INTERVAL"]
+    if interval <= 0:
+        return None
+
+    def run():
+        while True:
+            # jitter spreads the workers so most of them find the lock free
+            time.sleep(interval * random.uniform(0.9, 1.1))
+            with app.app_context():
+                try:
+                    deleted = purge_expired_logs(
+                        app.config["LOG_RETENTION_DAYS"],
+                        app.config["LOG_PURGE_BATCH_SIZE"],
+                    )
+                    if deleted:
+                        app.logger.info("purged %d expired logs", deleted)
+                except Exception:
+                    app.logger.exception("log purge failed")
+
+    thread = threading.Thread(target=run, name="log-purger", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,149 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from .models.user import User
+from .models.record import Record
+from .models.rollup import DailyPoints, SemesterPoints
+from .extensions import db
+
+# daily_points (day, type, author) and semester_points (semester, user) are
+# kept in step with records by the write handlers: every insert, edit or
+# delete of a Record passes the affected rows through add_records /
+# remove_records inside the same transaction.
+
+TAIPEI = ZoneInfo("Asia/Taipei")
+BACKFILL_CHUNK = 5000
+
+def local_day(time: datetime) -> date:
+    if time.tzinfo is None:
+        time = time.replace(tzinfo=timezone.utc)     # SQLite drops the offset
+    return time.astimezone(TAIPEI).date()
+
+def semester_of(day: date) -> str:
+    """Fall (Aug-Jan) is "<year>-1", spring (Feb-Jul) "<year>-2", named
+    after the academic year they belong to."""
+    if day.month >= 8:
+        return f"{day.year}-1"
+    if day.month == 1:
+        return f"{day.year - 1}-1"
+    return f"{day.year - 1}-2"
+
+def _aggregate(rows, sign: int):
+    """Sum (time, type, author_account, user_account, amount) rows into
+    rollup deltas, sorted so concurrent writers lock rows in one order."""
+    daily = defaultdict(lambda: [0, 0])
+    semester = defaultdict(lambda: [0, 0])
+    for time, type_, author, account, amount in rows:
+        day = local_day(time)
+        for bucket in (daily[day, type_, author], semester[semester_of(day), account]):
+            bucket[0] += sign
+            bucket[1] += sign * amount
+    return (
+        [{"day": d, "type": t, "author_account": a, "records": n, "points": p}
+         for (d, t, a), (n, p) in sorted(daily.items())],
+        [{"semester": s, "user_account": u, "records": n, "points": p}
+         for (s, u), (n, p) in sorted(semester.items())],
+    )
+
+def _upsert(model, rows, keys):
+    if not rows:
+        return
+    dialect = postgresql if db.engine.dialect.name == "postgresql" else sqlite
+    stmt = dialect.insert(model)
+    db.session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=keys,
+            set_={
+                "records": model.records + stmt.excluded.records,
+                "points": model.points + stmt.excluded.points,
+            },
+        ),
+        rows,
+    )
+
+def _apply(rows, sign: int):
+    daily, semester = _aggregate(rows, sign)
+    _upsert(DailyPoints, daily, ["day", "type", "author_account"])
+    _upsert(SemesterPoints, semester, ["semester", "user_account"])
+
+def add_records(rows):
+    """Count new records: (time, type, author_account, user_account, amount)."""
+    _apply(rows, 1)
+
+def remove_records(rows):
+    """Uncount deleted records, or the old values of edited ones."""
+    _apply(rows, -1)
+
+def backfill() -> int:
+    """Recompute both rollups from records in one transaction; returns the
+    number of records read. Writes committed while it runs may be missed,
+    so run it when no one is adjusting points."""
+    db.session.execute(delete(DailyPoints))
+    db.session.execute(delete(SemesterPoints))
+
+    daily, semester = _aggregate(db.session.execute(
+        select(Record.time, Record.type, Record.author_account, Record.user_account, Record.amount)
+        .execution_options(yield_per=BACKFILL_CHUNK)
+    ), 1)
+    if daily:
+        db.session.execute(insert(DailyPoints), daily)
+    if semester:
+        db.session.execute(insert(SemesterPoints), semester)
+    count = sum(row["records"] for row in daily)
+    db.session.commit()
+    return count
+
+# ---------------- Reports ----------------
+def points_per_day(since: date):
+    """[(day, records, points)] from `since` on, oldest first."""
+    return db.session.execute(
+        select(DailyPoints.day, func.sum(DailyPoints.records), func.sum(DailyPoints.points))
+        .where(DailyPoints.day >= since)
+        .group_by(DailyPoints.day)
+        .order_by(DailyPoints.day)
+    ).all()
+
+def points_per_week(days):
+    """Fold points_per_day rows into (monday, records, points) weeks."""
+    weeks = defaultdict(lambda: [0, 0])
+    for day, records, points in days:
+        week = weeks[day - timedelta(days=day.weekday())]
+        week[0] += records
+        week[1] += points
+    return [(monday, records, points) for monday, (records, points) in sorted(weeks.items())]
+
+def milestone_members(semester: str, milestone: int):
+    """[(account, name, points)] of members at or above `milestone` in `semester`."""
+    return db.session.execute(
+        select(User.account, User.name, SemesterPoints.points)
+        .join(User, User.account == SemesterPoints.user_account)
+        .where(SemesterPoints.semester == semester, SemesterPoints.points >= milestone)
+        .order_by(SemesterPoints.points.desc(), User.account)
+    ).all()
+
+def semesters() -> list:
+    """Semesters with any rollup rows, newest first."""
+    return list(db.session.scalars(
+        select(SemesterPoints.semester).distinct().order_by(SemesterPoints.semester.desc())
+    ))
+
+def adjustments_per_author(since: date):
+    """[(account, name, records, added, removed)] from `since` on."""
+    added = func.sum(DailyPoints.points).filter(DailyPoints.type == "add")
+    removed = func.sum(DailyPoints.points).filter(DailyPoints.type == "remove")
+    return db.session.execute(
+        select(
+            DailyPoints.author_account,
+            User.name,
+            func.sum(DailyPoints.records).label("records"),
+            func.coalesce(added, 0),
+            func.coalesce(removed, 0),
+        )
+        .outerjoin(User, User.account == DailyPoints.author_account)
+        .where(DailyPoints.day >= since)
+        .group_by(DailyPoints.author_account, User.name)
+        .order_by(func.sum(DailyPoints.records).desc())
+    ).all()
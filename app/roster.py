@@ -0,0 +1,113 @@
+import multiprocessing
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from re import fullmatch
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from werkzeug.security import generate_password_hash
+
+from .models.user import User
+from .extensions import db
+from .audit import audit_log
+from . import versions
+from .imports import RowError, read_rows
+
+ROSTER_COLUMNS = ("account", "name", "password")
+IN_CHUNK = 500          # accounts per existence lookup
+PARALLEL_MIN = 16       # fewer passwords than this are hashed inline
+
+ImportReport = namedtuple("ImportReport", ["created", "errors"])
+
+# ---------------- Validation ----------------
+def is_valid_password(password: str) -> bool:
+    return bool(fullmatch(r"[a-zA-Z0-9-_]+", password))
+
+def validate_member(account: str, name: str, password: str, confirm: str = None):
+    """The registration rules; returns the error message or None.
+    `confirm` is only checked when given (the register form has one)."""
+    if not account.isdigit() or not (len(account) == 9):
+        return "帳號需為 9 位數字。"
+    if not name or len(name) < 2:
+        return "姓名至少需 2 個字。"
+    if len(password) < 4 or len(password) > 20:
+        return "密碼長度需為 4 到 20 碼內。"
+    if not is_valid_password(password):
+        return "密碼只能包含數字、英文字母、 '-' 和 '_' 。"
+    if confirm is not None and password != confirm:
+        return "兩次密碼不一致。"
+    return None
+
+# ---------------- Hashing ----------------
+def hash_passwords(passwords, workers: int = 0) -> list:
+    """generate_password_hash over `passwords`, spread across `workers`
+    processes (0 = one per CPU) since each hash is deliberately slow."""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(passwords) < PARALLEL_MIN:
+        return [generate_password_hash(p) for p in passwords]
+
+    # forked children would inherit the worker's threads and DB connections
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        chunksize = max(len(passwords) // (workers * 4), 1)
+        return list(pool.map(generate_password_hash, passwords, chunksize=chunksize))
+
+# ---------------- Import ----------------
+def _existing(accounts) -> set:
+    found = set()
+    for i in range(0, len(accounts), IN_CHUNK):
+        found.update(db.session.execute(
+            select(User.account).where(User.account.in_(accounts[i:i + IN_CHUNK]))
+        ).scalars())
+    return found
+
+def import_members(rows, author_account: str = None, url: str = "/admin/import",
+                   workers: int = 0) -> ImportReport:
+    """Create the members in `rows` ((line, {account, name, password}) as
+    read by read_rows) in one transaction.
+
+    Rows failing the registration rules, repeating an account of the same
+    file or naming an existing account are reported and skipped; the rest
+    are inserted together. Each new member gets an audit entry under
+    `author_account` (or their own account, like /register).
+    """
+    errors = []
+    valid = {}
+    for line, row in rows:
+        account, name, password = row["account"], row["name"], row["password"]
+        error = validate_member(account, name, password)
+        if error is None and account in valid:
+            error = f"與第 {valid[account][0]} 列的帳號重複。"
+        if error:
+            errors.append(RowError(line, account, error))
+        else:
+            valid[account] = (line, name, password)
+
+    for account in _existing(list(valid)):
+        errors.append(RowError(valid.pop(account)[0], account, "此帳號已存在。"))
+    errors.sort()
+    if not valid:
+        return ImportReport([], errors)
+
+    accounts = list(valid)
+    hashes = hash_passwords([valid[a][2] for a in accounts], workers)
+    try:
+        db.session.execute(insert(User), [
+            {"account": account, "name": valid[account][1], "password_hash": password_hash,
+             "points": 0, "record_count": 0}
+            for account, password_hash in zip(accounts, hashes)
+        ])
+        for account in accounts:
+            audit_log(author_account or account, url, f"Import member {account} {valid[account][1]}")
+        versions.bump("users")
+        db.session.commit()
+    except IntegrityError:
+        # someone registered one of these accounts since the lookup above
+        db.session.rollback()
+        errors += [RowError(valid[a][0], a, "匯入失敗：帳號剛被建立，請重新匯入。") for a in accounts]
+        return ImportReport([], sorted(errors))
+    return ImportReport(accounts, errors)
+
+def import_roster_file(filename: str, stream, **kwargs) -> ImportReport:
+    return import_members(read_rows(filename, stream, ROSTER_COLUMNS), **kwargs)
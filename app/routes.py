@@ -1,44 +1,43 @@
-import csv
 import os
-import pandas as pd
-from re import fullmatch
+import hmac
 from functools import wraps
-from sqlalchemy import text, func, or_, select
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
 from zoneinfo import ZoneInfo
-from datetime import timedelta
-from io import StringIO, BytesIO
-from math import ceil
-from flask import Blueprint, request, render_template, redirect, url_for, session, Response, send_from_directory, current_app
+from datetime import datetime, timedelta, timezone
+from flask import Blueprint, request, render_template, redirect, url_for, session, Response, send_from_directory, current_app, flash, stream_with_context, send_file, jsonify
 
 from .models.user import User
 from .models.record import Record
 from .models.admin import Admin
 from .models.log import Log
 from .extensions import db
+from .export import (
+    COLUMNAR_FORMATS, DUMP_ALL, DUMP_FORMATS, FORMATS, TABLES,
+    columnar_file, csv_chunks, dump_chunks, dump_tables, stream_table, xlsx_file,
+)
+from .audit import audit_log
+from .dbpool import pool_stats
+from .metrics import render_metrics
+from .ledger import adjust_checkpoint
+from .identity import get_current_user, invalidate_admin_roster, is_admin
+from . import rollups, versions
+from .batch import APPLIED, UNKNOWN, adjustment_log, apply_adjustments, clamp_amount_update
+from .leaderboard import DEFAULT_SORT, SORTS
+from .fragments import invalidate_fragments, leaderboard_fragment
+from .snapshots import send_snapshot
+from .pagination import cached_count, keyset_page
+from .search import log_filter
+from .imports import ImportFileError
+from .roster import import_roster_file, validate_member
+from .points_import import import_adjustments
 
 bp = Blueprint("main", __name__)
 
 MILESTONE = 15
 TAIPEI = ZoneInfo("Asia/Taipei")
-MIN_POINT_UPDATE = -100
-MAX_POINT_UPDATE = 100
-
-def clamp_amount_update(amount: int) -> int:
-    return min(max(amount, MIN_POINT_UPDATE), MAX_POINT_UPDATE)
 
 # ---------------- Helpers ----------------
-def get_current_user():
-    account = session.get("account")
-    if not account:
-        return None
-    return User.query.get(account)
-
-def is_admin(user: User) -> bool:
-    return Admin.query.get(user.account) is not None
-
-def is_valid_password(password: str) -> bool:
-    return bool(fullmatch(r"[a-zA-Z0-9-_]+", password))
-
 def login_required(f):
     @wraps(f)
     def wrapper(*args, **kwargs):
@@ -68,11 +67,10 @@ def index():
             .order_by(Record.time.desc())
             .all()
         )
-        is_admin = Admin.query.get(user.account) is not None
         return render_template(
             "index.html",
             user=user,
-            is_admin=is_admin,
+            is_admin=is_admin(user),
             records=records,
             milestone=MILESTONE,
         )
@@ -132,34 +130,26 @@ def register_post():
     password = request.form.get("password","")
     confirm = request.form.get("confirm","")
 
-    if not account.isdigit() or not (len(account) == 9):
-        return render_template("register.html", error="帳號需為 9 位數字。"), 400
-    if not name or len(name) < 2:
-        return render_template("register.html", error="姓名至少需 2 個字。"), 400
-    if len(password) < 4 or len(password) > 20:
-        return render_template("register.html", error="密碼長度需為 4 到 20 碼內。"), 400
-    if not is_valid_password(password):
-        return render_template("register.html", error="密碼只能包含數字、英文字母、 '-' 和 '_' 。"), 400
-    if password != confirm:
-        return render_template("register.html", error="兩次密碼不一致。"), 400
+    error = validate_member(account, name, password, confirm)
+    if error:
+        return render_template("register.html", error=error), 400
     if User.query.get(account):
         return render_template("register.html", error="此帳號已存在。"), 400
 
     user = User(account=account, name=name)
     user.set_password(password)
     db.session.add(user)
+    audit_log(account, "/register")
+    versions.bump("users")
     db.session.commit()
+    invalidate_fragments()
     
     SUPER_ADMIN = "113062206"   # your account
-    if not Admin.query.get(SUPER_ADMIN):
+    if not db.session.get(Admin, SUPER_ADMIN):
         db.session.add(Admin(account=SUPER_ADMIN))
+        versions.bump("admins")
         db.session.commit()
         
-    rec = Log(user=user,
-              url="/register")
-    db.session.add(rec)
-    db.session.commit()
-        
     return redirect(url_for("main.login_get"))
 
 # --- Admin dashboard ---
@@ -172,90 +162,67 @@ def admin():
     target_accounts = targets_str.split(',') if target_account else None
     
     search = request.args.get("search", "").strip()
-    sort = request.args.get("sort", "account_asc")
-    page = request.args.get("page", 1, type=int)
+    sort = request.args.get("sort", DEFAULT_SORT)
+    if sort not in SORTS:
+        sort = DEFAULT_SORT
     per_page = 20
+    records_per_page = 50
 
     target = None
     targets = None
     records = None
-    is_admin = False
+    records_page = None
+    target_is_admin = False
     
-    query = (
-        select(
-            User.account,
-            User.name,
-            func.coalesce(func.sum(Record.amount), 0).label("points"),
-            func.count(Record.id).label("count"),
-        )
-        .outerjoin(Record, User.account == Record.user_account)
-        .group_by(User.account, User.name)
+    leaderboard = leaderboard_fragment(
+        user.account, search, sort, per_page,
+        after=request.args.get("after"),
+        before=request.args.get("before"),
+        last=bool(request.args.get("last")),
     )
     
-    if search:
-        query = query.filter(
-            or_(
-                User.account.ilike(f"%{search}%"),
-                User.name.ilike(f"%{search}%"),
-            )
-        )
-        
-    if sort == "account_asc":
-        query = query.order_by(User.account.asc())
-    elif sort == "account_desc":
-        query = query.order_by(User.account.desc())
-    elif sort == "name_asc":
-        query = query.order_by(User.name.asc())
-    elif sort == "name_desc":
-        query = query.order_by(User.name.desc())
-    elif sort == "points_asc":
-        query = query.order_by(func.coalesce(func.sum(Record.amount), 0).asc())
-    elif sort == "points_desc":
-        query = query.order_by(func.coalesce(func.sum(Record.amount), 0).desc())
-        
-    count_query = select(func.count()).select_from(query.subquery())
-    total = db.session.execute(count_query).scalar()
-    total_pages = ceil(total / per_page)
-    
-    statement = query.order_by(User.account).limit(per_page).offset((page - 1) * per_page)    
-    all_users = db.session.execute(statement).all()
-    
     if target_accounts and len(target_accounts) > 1:
-        targets_user = User.query.filter(User.account.in_(target_accounts)).all()
+        targets = db.session.execute(
+            select(User.account, User.name, User.points)
+            .where(User.account.in_(target_accounts))
+            .order_by(User.account)
+        ).all()
         
-        if targets_user:
-            targets = [{
-                "account": t.account,
-                "name": t.name,
-                "points": sum(r.amount for r in t.records),
-            } for t in targets_user]
-        else:
+        if not targets:
             return render_template(
                 "admin.html",
                 user=user,
                 target=None,
                 targets=None,
-                is_admin=is_admin,
+                is_admin=target_is_admin,
                 records=None,
-                page=page,
                 all_users=[],
-                total_pages=0,
-                page_indexes=[],
+                total=0,
+                next_cursor=None,
+                prev_cursor=None,
                 search=search,
                 sort=sort,
                 milestone=MILESTONE,
                 error="找不到批次帳號。",
             )
     elif target_account:
-        target_user = User.query.get(target_account)
+        target_user = db.session.get(User, target_account)
         if target_user:
-            records = target_user.records
-            is_admin = Admin.query.get(target_user.account) is not None
-            points = sum(r.amount for r in records)
+            records_page = keyset_page(
+                select(Record)
+                .options(joinedload(Record.author))
+                .where(Record.user_account == target_user.account),
+                "records", [Record.time, Record.id], True, records_per_page,
+                after=request.args.get("records_after"),
+                before=request.args.get("records_before"),
+                scalars=True,
+            )
+            records = records_page.items
+            target_is_admin = is_admin(target_user)
             target = {
                 "account": target_user.account,
                 "name": target_user.name,
-                "points": points,
+                "points": target_user.points,
             }
         else:
             return render_template(
@@ -263,35 +230,29 @@ def admin():
                 user=user,
                 target=None,
                 targets=None,
-                is_admin=is_admin,
+                is_admin=target_is_admin,
                 records=None,
-                page=page,
                 all_users=[],
-                total_pages=0,
-                page_indexes=[],
+                total=0,
+                next_cursor=None,
+                prev_cursor=None,
                 search=search,
                 sort=sort,
                 milestone=MILESTONE,
                 error="找不到該帳號。",
             )
     
-    page_indexes = list(range(
-        max(1, page - 2), 
-        min(total_pages, page + 2) + 1
-    ))
-    
     return render_template(
         "admin.html",
         user=user,
         target=target,
         targets=targets,
         targets_str=targets_str,
-        is_admin=is_admin,
+        is_admin=target_is_admin,
         records=records,
-        page=page,
-        all_users=all_users,
-        total_pages=total_pages,
-        page_indexes=page_indexes,
+        records_next=records_page.next_cursor if records_page else None,
+        records_prev=records_page.prev_cursor if records_page else None,
+        leaderboard=leaderboard,
         search=search,
         sort=sort,
         milestone=MILESTONE,
@@ -329,19 +290,20 @@ def admin_adjust():
     if user:
         rec = Record(user=target,
                     author=user,
+                    time=datetime.now(timezone.utc),
                     type="add" if amt > 0 else "remove",
                     amount=amt,
                     reason=reason)
         
         target.points += amt
+        target.record_count += 1
         db.session.add(rec)
+        rollups.add_records([(rec.time, rec.type, user.account, target.account, amt)])
+        audit_log(user.account, "/admin/adjust",
+                  adjustment_log(amt, target.account, target.name, reason))
+        versions.bump("records", "users")
         db.session.commit()
-        
-        log = Log(user=user,
-                url="/admin/adjust",
-                log=f"{'Add' if amt > 0 else 'Remove'} {abs(amt)} points {'from' if amt > 0 else 'to'} {target.account} {target.name} for the reason [ {reason} ]")
-        db.session.add(log)
-        db.session.commit()
+        invalidate_fragments()
 
     return redirect(url_for("main.admin", target=account))
 
@@ -356,45 +318,35 @@ def admin_batch_adjust():
     reason = request.form.get("reason", "").strip()
     user = get_current_user()
     
-    accounts = list(set(accounts))
-
-    for account in accounts:
-        target = User.query.get(account)
-        if not target:
-            continue
-
-        try:
-            amt = int(amount_raw)
-        except ValueError:
-            continue
-
-        if amt == 0:
-            continue
-        if not reason:
-            continue
-
-        # Normalize sign
-        if op == "add" and amt < 0: amt = abs(amt)
-        if op == "remove" and amt > 0: amt = -amt
-        
-        amt = clamp_amount_update(amt)
-
-        if user:
-            rec = Record(user=target,
-                        author=user,
-                        type="add" if amt > 0 else "remove",
-                        amount=amt,
-                        reason=reason)
-            
-            target.points += amt
-            db.session.add(rec)
-            db.session.commit()
-            
-            log = Log(user=user,
-                    url="/admin/batch_adjust",
-                    log=f"{'Add' if amt > 0 else 'Remove'} {abs(amt)} points {'from' if amt > 0 else 'to'} {target.account} {target.name} for the reason [ {reason} ]")
-            db.session.add(log)
-            db.session.commit()
+    # each account is adjusted once, however often it is listed
+    accounts = list(dict.fromkeys(a.strip() for a in accounts if a.strip()))
+
+    try:
+        amt = int(amount_raw)
+    except ValueError:
+        amt = 0
+    if amt == 0 or not reason or not user:
+        flash("批次調整失敗：請輸入非零整數與原因。", "error")
+        return redirect(url_for("main.admin", target=accounts_str))
+
+    # Normalize sign
+    if op == "add" and amt < 0: amt = abs(amt)
+    if op == "remove" and amt > 0: amt = -amt
+    
+    amt = clamp_amount_update(amt)
+
+    results = apply_adjustments(
+        user,
+        [(account, amt, reason) for account in accounts],
+        url="/admin/batch_adjust",
+    )
+    invalidate_fragments()
+    applied = [a for a, r in results.items() if r == APPLIED]
+    unknown = [a for a, r in results.items() if r == UNKNOWN]
+    if applied:
+        flash(f"已調整 {len(applied)} 個帳號：{', '.join(applied)}", "success")
+    if unknown:
+        flash(f"找不到帳號：{', '.join(unknown)}", "error")
 
     return redirect(url_for("main.admin", target=accounts_str))
 
@@ -443,16 +395,18 @@ def admin_record_update():
     
     rec_old_amount = rec.amount
     rec_old_reason = rec.reason
+    rollups.remove_records([(rec.time, rec.type, rec.author_account, account, rec.amount)])
 
     # Adjust user points: remove old, apply new
     target.points -= rec.amount
     target.points += amt
+    adjust_checkpoint(account, rec.id, amt - rec.amount)
 
     rec.type = "add" if amt > 0 else "remove"
     rec.amount = amt
     rec.reason = reason
     # keep original time
-    db.session.commit()
+    rollups.add_records([(rec.time, rec.type, rec.author_account, account, rec.amount)])
     
     if user:
         log_message = f"Updated record {rec.id} for {account} ( "
@@ -463,11 +417,11 @@ def admin_record_update():
         if rec.reason != rec_old_reason:
             log_message += f"reason: {rec_old_reason} -> {rec.reason} ; "
         log_message += ")"
-        log = Log(user=user,
-                url="/admin/record/update",
-                log=log_message)
-        db.session.add(log)
-        db.session.commit()
+        audit_log(user.account, "/admin/record/update", log_message)
+
+    versions.bump("records", "users")
+    db.session.commit()
+    invalidate_fragments()
 
     return redirect(url_for("main.admin", target=account))
 
@@ -494,19 +448,20 @@ def admin_record_delete():
 
     # Adjust points before deleting
     target.points -= rec.amount
+    target.record_count -= 1
+    adjust_checkpoint(account, rec.id, -rec.amount, -1)
+    rollups.remove_records([(rec.time, rec.type, rec.author_account, account, rec.amount)])
 
     if user:
         tw_time = rec.time.astimezone(ZoneInfo("Asia/Taipei"))
         formatted = tw_time.strftime("%Y-%m-%d %H:%M:%S")
         log_message = f"Delete record {rec.id} for {account} with ( time = {formatted} ; type = {rec.type} ; amount = {rec.amount} ; reason = {rec.reason} )"
-        log = Log(user=user,
-                url="/admin/record/update",
-                log=log_message)
-        db.session.add(log)
-        db.session.commit()
+        audit_log(user.account, "/admin/record/update", log_message)
         
     db.session.delete(rec)
+    versions.bump("records", "users")
     db.session.commit()
+    invalidate_fragments()
     
     return redirect(url_for("main.admin", target=account))
 
@@ -530,7 +485,7 @@ def toggle_admin():
     if user.account == "113062206":
         return redirect(url_for("main.admin"))
 
-    existing = Admin.query.get(account)
+    existing = db.session.get(Admin, account)
     if existing:
         # remove admin entry
         db.session.delete(existing)
@@ -540,16 +495,40 @@ def toggle_admin():
         db.session.add(Admin(account=account))
         action = "granted"
 
+    versions.bump("admins")
+    audit_log(user.account, "/admin/record/update", f"{account} was {action} admin")
     db.session.commit()
-    
-    log = Log(user=user,
-            url="/admin/record/update",
-            log=f"{account} was {action} admin")
-    db.session.add(log)
-    db.session.commit()
+    invalidate_admin_roster()
         
     return redirect(url_for("main.admin", target=account))
 
+@bp.get("/admin/analytics")
+@admin_required
+def admin_analytics():
+    # everything here reads the rollup tables, never records
+    try:
+        days = min(max(int(request.args.get("days", 30)), 1), 366)
+    except ValueError:
+        days = 30
+    today = rollups.local_day(datetime.now(timezone.utc))
+    since = today - timedelta(days=days - 1)
+
+    semester = request.args.get("semester") or rollups.semester_of(today)
+    per_day = rollups.points_per_day(since)
+    return render_template(
+        "analytics.html",
+        user=get_current_user(),
+        days=days,
+        since=since,
+        per_day=per_day,
+        per_week=rollups.points_per_week(per_day),
+        semester=semester,
+        semesters=sorted(set(rollups.semesters()) | {semester}, reverse=True),
+        members=rollups.milestone_members(semester, MILESTONE),
+        authors=rollups.adjustments_per_author(since),
+        milestone=MILESTONE,
+    )
+
 @bp.get("/admins")
 @admin_required
 def admins_list():
@@ -561,125 +540,166 @@ def admins_list():
     )
     return render_template("adminlist.html", admins=admins, milestone=MILESTONE, user=get_current_user())
 
+@bp.route("/admin/import", methods=["GET", "POST"])
+@admin_required
+def admin_import():
+    user = get_current_user()
+    if request.method == "GET":
+        return render_template("import.html", user=user)
+
+    upload = request.files.get("file")
+    if not upload or not upload.filename:
+        return render_template("import.html", user=user, error="請選擇要匯入的檔案。"), 400
+    try:
+        report = import_roster_file(
+            upload.filename, upload.stream,
+            author_account=user.account, url="/admin/import",
+            workers=current_app.config["ROSTER_HASH_WORKERS"],
+        )
+    except ImportFileError as e:
+        return render_template("import.html", user=user, error=str(e)), 400
+
+    if report.created:
+        invalidate_fragments()
+        flash(f"已建立 {len(report.created)} 個帳號。", "success")
+    if report.errors:
+        flash(f"{len(report.errors)} 列未匯入，請見下方錯誤。", "error")
+    return render_template("import.html", user=user, report=report)
+
+@bp.route("/admin/import_points", methods=["GET", "POST"])
+@admin_required
+def admin_import_points():
+    user = get_current_user()
+    if request.method == "GET":
+        return render_template("import_points.html", user=user, dry_run=True)
+
+    upload = request.files.get("file")
+    dry_run = request.form.get("dry_run") == "1"
+    if not upload or not upload.filename:
+        return render_template("import_points.html", user=user, dry_run=dry_run, error="請選擇要匯入的檔案。"), 400
+    try:
+        report = import_adjustments(user, upload.filename, upload.stream, dry_run=dry_run)
+    except ImportFileError as e:
+        return render_template("import_points.html", user=user, dry_run=dry_run, error=str(e)), 400
+
+    if report.applied:
+        invalidate_fragments()
+        flash(f"已匯入 {report.rows} 筆紀錄，共 {report.accounts} 個帳號。", "success")
+    elif report.error_count:
+        flash(f"{report.error_count} 列有錯誤，整份檔案未匯入。", "error")
+    elif not report.rows:
+        flash("檔案中沒有可匯入的資料。", "error")
+    return render_template("import_points.html", user=user, dry_run=dry_run, report=report)
+
+@bp.get("/admin/pool")
+@admin_required
+def admin_pool():
+    # per-worker: each gunicorn process answers with its own pool
+    return jsonify(pool_stats(current_app))
+
+@bp.get("/metrics")
+def metrics():
+    token = current_app.config["METRICS_TOKEN"]
+    authorized = token and hmac.compare_digest(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    )
+    if not authorized:
+        u = get_current_user()
+        if not u or not is_admin(u):
+            return "Forbidden", 403
+    return Response(render_metrics(current_app), mimetype="text/plain; version=0.0.4")
+
 @bp.route("/export", methods=["GET", "POST"])
+@admin_required
 def export():
-    tables = ["Users", "Records", "Admins"]
+    tables = TABLES
     
-    if request.method == "POST":
-        table = request.form["table"]
-        format_ = request.form["format"]
-        
-        query = ""
-        if table == "Users":
-            query = "SELECT account, name, password_hash, points FROM users"
-        elif table == "Records":
-            query = f"""
-                SELECT id, user_account, (time AT TIME ZONE 'Asia/Taipei') AS time,
-                    type, amount, reason
-                FROM records
-            """
-        elif table == "Admins":
-            query = "SELECT account FROM admins"
-            
-        rows = db.session.execute(text(query)).mappings().all()
-
-        if not rows:
+    # downloads are GETs (Range and If-None-Match only apply to those);
+    # POST is kept for forms and scripts that still use it
+    if request.method == "POST" or "table" in request.args:
+        table = request.values.get("table", "")
+        format_ = request.values.get("format", "")
+        if format_ not in FORMATS or table not in tables and not (
+            table == DUMP_ALL and format_ in DUMP_FORMATS
+        ):
+            return render_template("export.html", tables=tables, error="未知的資料表或格式。"), 400
+
+        # log before streaming starts; committing afterwards would close the cursor
+        audit_log(get_current_user().account, "/export", f"Export {table} as {format_}")
+        db.session.commit()
+
+        # single tables come from their snapshot file when it is current
+        snapshot = send_snapshot(table, format_)
+        if snapshot is not None:
+            return snapshot
+
+        # Export as SQL (multi-row INSERT or COPY blocks)
+        if format_ in DUMP_FORMATS:
+            return Response(
+                stream_with_context(dump_chunks(dump_tables(table), format_)),
+                mimetype="text/sql",
+                headers={"Content-Disposition": f"attachment;filename={table}.sql"},
+            )
+
+        # Export as Parquet or Arrow IPC (typed columns)
+        if format_ in COLUMNAR_FORMATS:
+            extension, mimetype = COLUMNAR_FORMATS[format_]
+            return send_file(
+                columnar_file(table, format_),
+                mimetype=mimetype,
+                as_attachment=True,
+                download_name=f"{table}.{extension}",
+            )
+
+        stream = stream_table(table)
+        if stream is None:
             return "No data in table."
 
-        columns = rows[0].keys()
+        columns, partitions = stream
         
         # Export as CSV
         if format_ == "csv":
-            output = StringIO()
-            writer = csv.DictWriter(output, fieldnames=columns, extrasaction="ignore")
-
-            writer.writeheader()
-            writer.writerows(rows)
-            
-            csv_text = "\ufeff" + output.getvalue()
-
             return Response(
-                csv_text,
+                stream_with_context(csv_chunks(columns, partitions)),
                 mimetype="text/csv",
                 headers={"Content-Disposition": f"attachment;filename={table}.csv"},
             )
 
         # Export as Excel
-        elif format_ == "excel":
-            df = pd.DataFrame(rows, columns=columns)
-            output = BytesIO()
-            with pd.ExcelWriter(output, engine="openpyxl") as writer:
-                df.to_excel(writer, index=False, sheet_name=table)
-            output.seek(0)
-            return Response(
-                output,
+        if format_ == "excel":
+            return send_file(
+                xlsx_file(table, columns, partitions),
                 mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                headers={"Content-Disposition": f"attachment;filename={table}.xlsx"},
+                as_attachment=True,
+                download_name=f"{table}.xlsx",
             )
 
-        # Export as SQL (INSERT statements)
-        elif format_ == "sql":
-            sql_lines = []
-
-            # Quote column names for Postgres
-            colnames = ", ".join([f'"{col}"' for col in columns])
-            placeholders = ", ".join([f":{col}" for col in columns])
-
-            stmt = text(f"INSERT INTO {table} ({colnames}) VALUES ({placeholders});")
-
-            for row in rows:
-                # Compile statement with bound parameters
-                compiled = stmt.bindparams(**row).compile(
-                    dialect=db.engine.dialect,
-                    compile_kwargs={"literal_binds": True}
-                )
-                sql_lines.append(str(compiled))
-
-            sql_text = "\n".join(sql_lines)
-            return Response(
-                sql_text,
-                mimetype="text/sql",
-                headers={"Content-Disposition": f"attachment;filename={table}.sql"},
-            )
-    
-        user = get_current_user()
-        if user:
-            log = Log(user=user,
-                    url="/export",
-                    log=f"Export {table} as {format_}")
-            db.session.add(log)
-            db.session.commit()
-
     return render_template("export.html", tables=tables)
 
 @bp.route("/logs")
 def logs():
     q = request.args.get("q", "")
-    page = request.args.get("page", 1, type=int)
     per_page = 20
 
-    query = Log.query.order_by(Log.time.desc())
+    query = select(Log).options(joinedload(Log.user))
     if q:
-        query = query.filter(Log.log.ilike(f"%{q}%"))
-        
-    count_query = select(func.count()).select_from(query.subquery())
-    total = db.session.execute(count_query).scalar()
-    total_pages = ceil(total / per_page)
-    
-    query = query.limit(per_page).offset((page - 1) * per_page)
-    logs = query.all()
-    
-    page_indexes = list(range(
-        max(1, page - 2), 
-        min(total_pages, page + 2) + 1
-    ))
+        query = query.filter(log_filter(q))
+    total = cached_count(("logs", q), query)
+
+    logs_page = keyset_page(
+        query, "logs", [Log.time, Log.id], True, per_page,
+        after=request.args.get("after"),
+        before=request.args.get("before"),
+        last=bool(request.args.get("last")),
+        scalars=True,
+    )
     
     return render_template(
         "logs.html",
-        logs=logs,
-        total_pages=total_pages,
-        page=page,
-        page_indexes=page_indexes,
+        logs=logs_page.items,
+        total=total,
+        next_cursor=logs_page.next_cursor,
+        prev_cursor=logs_page.prev_cursor,
         q=q
     )
     
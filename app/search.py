@@ -0,0 +1,20 @@
+from sqlalchemy import or_
+
+from .models.user import User
+from .models.log import Log
+
+# On PostgreSQL the searched columns carry pg_trgm GIN indexes, which serve
+# ILIKE '%term%' directly. SQLite has no infix index, so the same expression
+# falls back to a scan there; that is fine for the DevConfig database.
+
+def contains(column, term: str):
+    """Case-insensitive substring match of `term` taken literally, so user
+    input containing % or _ is not treated as a wildcard."""
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return column.ilike(f"%{escaped}%", escape="\\")
+
+def user_filter(term: str):
+    return or_(contains(User.account, term), contains(User.name, term))
+
+def log_filter(term: str):
+    return contains(Log.log, term)
@@ -0,0 +1,227 @@
+import os
+import queue
+import re
+import secrets
+import shutil
+import threading
+from pathlib import Path
+from flask import current_app, send_file
+from sqlalchemy.dialects import postgresql, sqlite
+
+from .export import (
+    COLUMNAR_FORMATS,
+    columnar_file, csv_chunks, dump_chunks, dump_tables, stream_table, xlsx_file,
+)
+from .compress import COMPRESSIBLE, SUFFIXES, best_encoding, compress_file, encodings
+from .models.version import DataVersion
+from .extensions import db
+from . import versions
+
+# Export downloads of single tables are served from files under
+# EXPORT_SNAPSHOT_DIR instead of re-running the export query per download.
+# A snapshot is named after the data version of its table, so a file only
+# ever holds one version and a download never serves stale rows: when the
+# version has moved on, the request streams the export live as before and
+# that table and format are queued for a build. Builds only follow
+# downloads: a burst of writes (an attendance session) costs nothing until
+# someone exports, and then one build of the one format asked for.
+#
+# Version counters start over in a recreated database, so file names also
+# carry a random id of the database (the "database" row of data_versions):
+# snapshots written from another database are never served.
+#
+# Text formats are also stored gzip (and brotli) encoded next to the plain
+# file, since the compression hook leaves send_file responses alone.
+#
+# The "All" dump also covers logs, which aren't versioned; it stays live.
+DATABASE_KEY = "database"
+SNAPSHOT_TABLES = {"Users": "users", "Records": "records", "Admins": "admins"}
+
+# format -> (extension, mimetype)
+FILE_TYPES = {
+    "csv": ("csv", "text/csv"),
+    "excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "sql": ("sql", "text/sql"),
+    "copy": ("sql", "text/sql"),
+    **COLUMNAR_FORMATS,
+}
+
+# gzip level of the stored variants: built once in the background, so
+# spend the CPU on size
+VARIANT_LEVEL = 9
+
+class SnapshotBuilder:
+    """Rebuilds queued tables on one background thread per worker."""
+
+    def __init__(self, app):
+        self.app = app
+        self.directory = Path(app.config["EXPORT_SNAPSHOT_DIR"])
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._thread = None
+
+    def path(self, table: str, format_: str, database: int, version: int) -> Path:
+        extension = FILE_TYPES[format_][0]
+        return self.directory / f"{table.lower()}-{format_}-{database:x}-v{version}.{extension}"
+
+    def lookup(self, table: str, format_: str):
+        """The snapshot of `table` at its current data version, or None
+        (and a build is queued) when it hasn't been written yet."""
+        key = SNAPSHOT_TABLES[table]
+        found = versions.current(DATABASE_KEY, key)
+        if found[DATABASE_KEY]:
+            path = self.path(table, format_, found[DATABASE_KEY], found[key])
+            if path.exists():
+                return path
+        self.schedule(table, format_)
+        return None
+
+    def schedule(self, table: str, format_: str):
+        with self._lock:
+            if (table, format_) in self._pending:
+                return
+            self._pending.add((table, format_))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="export-snapshots", daemon=True)
+                self._thread.start()
+        self.queue.put((table, format_))
+
+    def _run(self):
+        while True:
+            table, format_ = self.queue.get()
+            with self._lock:
+                self._pending.discard((table, format_))     # a download from now on queues it again
+            with self.app.app_context():
+                try:
+                    self.build(table, format_)
+                except Exception:
+                    # e.g. the Records CSV/Excel query is PostgreSQL-only
+                    self.app.logger.exception("export snapshot of %s as %s failed", table, format_)
+
+    def build(self, table: str, format_: str):
+        """Write `table` as `format_` at its current version and drop the
+        older files of it. Gives up if a write lands meanwhile; the next
+        download queues another build."""
+        key = SNAPSHOT_TABLES[table]
+        database = _database_id()
+        version = versions.current(key)[key]
+        path = self.path(table, format_, database, version)
+        if not path.exists():
+            tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+            try:
+                written = _write_snapshot(table, format_, tmp)
+                # end the read transaction so the check below sees newer commits
+                db.session.rollback()
+                if versions.current(key)[key] != version:
+                    return
+                if written:
+                    self._write_variants(format_, tmp, path)
+                    os.replace(tmp, path)
+            finally:
+                tmp.unlink(missing_ok=True)
+        self._prune(table, format_, database, version)
+
+    def _write_variants(self, format_: str, source: Path, path: Path):
+        """Precompressed copies of a text snapshot, published before the
+        snapshot itself so its first download can use them."""
+        if FILE_TYPES[format_][1] not in COMPRESSIBLE or not self.app.config["COMPRESS_RESPONSES"]:
+            return
+        for encoding in encodings():
+            variant = _variant(path, encoding)
+            tmp = variant.with_name(f".{variant.name}.{os.getpid()}.tmp")
+            compress_file(source, tmp, encoding, VARIANT_LEVEL)
+            os.replace(tmp, variant)
+
+    def _prune(self, table: str, format_: str, database: int, version: int):
+        """Drop the files of older versions, and of other databases. A build
+        that finished late leaves newer files alone: another worker may
+        already have written (and be serving) them."""
+        pattern = re.compile(rf"{re.escape(table.lower())}-{re.escape(format_)}-([0-9a-f]+)-v(\d+)\.")
+        for path in self.directory.glob(f"{table.lower()}-{format_}-*"):
+            match = pattern.match(path.name)
+            if match is None:
+                continue
+            # .gz/.br variants go with their file
+            if int(match[1], 16) != database or int(match[2]) < version:
+                path.unlink(missing_ok=True)
+
+def _variant(path: Path, encoding: str) -> Path:
+    return path.with_name(path.name + SUFFIXES[encoding])
+
+def _database_id() -> int:
+    """This database's snapshot id, created on first use when no
+    migration seeded it (e.g. a db.create_all() database)."""
+    database = versions.current(DATABASE_KEY)[DATABASE_KEY]
+    if database:
+        return database
+    dialect = postgresql if db.engine.dialect.name == "postgresql" else sqlite
+    db.session.execute(
+        dialect.insert(DataVersion)
+        .values(key=DATABASE_KEY, version=secrets.randbelow(2**31 - 1) + 1)
+        .on_conflict_do_nothing(index_elements=["key"])
+    )
+    db.session.commit()
+    return versions.current(DATABASE_KEY)[DATABASE_KEY]
+
+def _write_snapshot(table: str, format_: str, path: Path) -> bool:
+    """Export `table` as `format_` into `path`; False for an empty table
+    (the live export answers those without a file)."""
+    if format_ in ("sql", "copy"):
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            f.writelines(dump_chunks(dump_tables(table), format_))
+        return True
+
+    if format_ in COLUMNAR_FORMATS:
+        with open(path, "wb") as f:
+            columnar_file(table, format_, f)
+        return True
+
+    stream = stream_table(table)
+    if stream is None:
+        return False
+    columns, partitions = stream
+    if format_ == "csv":
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            f.writelines(csv_chunks(columns, partitions))
+    else:
+        with xlsx_file(table, columns, partitions) as source, open(path, "wb") as f:
+            shutil.copyfileobj(source, f)
+    return True
+
+def send_snapshot(table: str, format_: str):
+    """A send_file response for the table's snapshot, or None when the
+    export has to be streamed live. The file is named after its version,
+    so the ETag changes with the data and Range requests resume downloads."""
+    builder = current_app.extensions["export_snapshots"]
+    if builder is None or table not in SNAPSHOT_TABLES:
+        return None
+    path = builder.lookup(table, format_)
+    if path is None:
+        return None
+    extension, mimetype = FILE_TYPES[format_]
+    compressible = mimetype in COMPRESSIBLE and current_app.config["COMPRESS_RESPONSES"]
+    encoding = None
+    if compressible:
+        stored = [e for e in encodings() if _variant(path, e).exists()]
+        encoding = best_encoding(stored) if stored else None
+        if encoding is not None:
+            path = _variant(path, encoding)
+    response = send_file(
+        path,
+        mimetype=mimetype,
+        as_attachment=True,
+        download_name=f"{table}.{extension}",
+        conditional=True,
+        etag=True,      # per file, so each encoding has its own
+    )
+    if compressible:
+        response.vary.add("Accept-Encoding")
+    if encoding is not None:
+        response.headers["Content-Encoding"] = encoding
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+def init_export_snapshots(app):
+    app.extensions["export_snapshots"] = SnapshotBuilder(app) if app.config["EXPORT_SNAPSHOTS"] else None
@@ -0,0 +1,32 @@
+from sqlalchemy import select, update
+
+from .models.version import DataVersion
+from .extensions import db
+
+# keys in use:
+#   admins   the admin roster (identity.AdminRoster)
+#   users    any users row: new members, points, record counts
+#   records  any records row
+#   database not a counter: a random id of the database, never bumped
+#            (snapshots.py names export files after it)
+
+def bump(*keys: str):
+    """Increment the version of `keys` inside the caller's transaction, so
+    caches keyed on them are invalidated exactly when the write commits.
+    Rows are locked in sorted order so concurrent writers can't deadlock."""
+    for key in sorted(keys):
+        result = db.session.execute(
+            update(DataVersion)
+            .where(DataVersion.key == key)
+            .values(version=DataVersion.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            db.session.add(DataVersion(key=key, version=1))
+
+def current(*keys: str) -> dict:
+    """{key: version} for `keys` in one query; unknown keys are 0."""
+    found = dict(db.session.execute(
+        select(DataVersion.key, DataVersion.version).where(DataVersion.key.in_(keys))
+    ).all())
+    return {key: found.get(key, 0) for key in keys}
@@ -0,0 +1,83 @@
+"""Size and load time of the Records export as CSV, Parquet and Arrow IPC.
+
+    python -m benchmarks.columnar [--users N] [--records N] [--repeat N]
+
+The CSV is written by the export's csv_chunks from the same columns the
+columnar formats read (the live Records CSV query is PostgreSQL-only);
+it is loaded both with the csv module, as the old notebooks did, and
+with pyarrow's multithreaded CSV reader.
+"""
+import argparse
+import csv
+import io
+import time
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from sqlalchemy import select
+
+from app.export import COLUMNAR_COLUMNS, STREAM_CHUNK, columnar_file, csv_chunks
+from app.extensions import db
+
+from .seed import bench_app, seed_records, seed_users
+
+def write_csv():
+    table = db.metadata.tables["records"]
+    names = [name for name, _ in COLUMNAR_COLUMNS["Records"]]
+    result = db.session.execute(
+        select(*(table.c[name] for name in names)).execution_options(yield_per=STREAM_CHUNK)
+    )
+    return "".join(csv_chunks(names, result.partitions())).encode("utf-8")
+
+def write_columnar(format_):
+    output = io.BytesIO()
+    columnar_file("Records", format_, output)
+    return output.getvalue()
+
+LOADERS = {
+    "csv (csv module)": ("csv", lambda data: sum(1 for _ in csv.reader(io.StringIO(data.decode("utf-8-sig")))) - 1),
+    "csv (pyarrow)": ("csv", lambda data: pa_csv.read_csv(io.BytesIO(data)).num_rows),
+    "parquet": ("parquet", lambda data: pq.read_table(io.BytesIO(data)).num_rows),
+    "arrow": ("arrow", lambda data: pa.ipc.open_file(pa.BufferReader(data)).read_all().num_rows),
+}
+
+def best_of(repeat, fn):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--records", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    app = bench_app()
+    with app.app_context():
+        seed_users(0, args.users)
+        seed_records(args.records, args.users)
+
+        files = {}
+        print(f"{'format':<10} {'bytes':>12} {'write s':>9}")
+        for format_, write in (
+            ("csv", write_csv),
+            ("parquet", lambda: write_columnar("parquet")),
+            ("arrow", lambda: write_columnar("arrow")),
+        ):
+            seconds, files[format_] = best_of(args.repeat, write)
+            db.session.rollback()
+            print(f"{format_:<10} {len(files[format_]):>12} {seconds:>9.3f}")
+
+    print(f"\n{'load':<18} {'rows':>10} {'seconds':>9}")
+    for name, (format_, load) in LOADERS.items():
+        seconds, rows = best_of(args.repeat, lambda: load(files[format_]))
+        print(f"{name:<18} {rows:>10} {seconds:>9.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Check that every hot query is served by an index.
+
+    python -m benchmarks.explain [--users 5000] [--records 50000] [--logs 50000]
+
+Seeds a benchmark database, captures the plan of each hot-path query
+(EXPLAIN on PostgreSQL, EXPLAIN QUERY PLAN on SQLite), prints it, and
+exits with status 1 if any of them falls back to a sequential scan,
+sorts a page instead of reading it in index order, or doesn't use the
+index it was given (REQUIRED_INDEXES).
+
+The statements come from the code paths that run them: keyset_query
+(what keyset_page executes, with a cursor the first page handed out),
+leaderboard_query, the search filters and retention's purge_batch.
+"""
+import argparse
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from sqlalchemy import select, text
+from sqlalchemy.orm import joinedload
+
+from app import ledger
+from app.api import LOGS_PER_PAGE, RECORDS_PER_PAGE, USERS_PER_PAGE
+from app.extensions import db
+from app.leaderboard import SORTS, leaderboard_query, sort_keys
+from app.models.log import Log
+from app.models.record import Record
+from app.pagination import decode_cursor, keyset_page, keyset_query
+from app.retention import purge_batch
+from app.search import log_filter
+
+from .seed import account_of, bench_app, name_of, seed_logs, seed_records, seed_users
+
+# query -> index its plan must use; the ledger reads every member, so only
+# its records lookup is held to an index
+REQUIRED_INDEXES = {
+    "ledger: verify": "ix_records_user_account_id",
+}
+# queries whose plan may sort, besides the "... search" ones (PostgreSQL
+# reads the trigram matches from a bitmap scan, then orders them)
+SORTED_QUERIES = ("ledger: verify",)    # GROUP BY
+
+SEARCH_USER = name_of(12)
+SEARCH_LOG = "bench 123"
+
+def second_page(query, kind, columns, descending, per_page, scalars=False):
+    """The statement keyset_page runs for the page after the first one,
+    with the cursor the first page actually handed out."""
+    first = keyset_page(query, kind, columns, descending, per_page, scalars=scalars)
+    cursor = decode_cursor(first.next_cursor, kind, columns)
+    return keyset_query(query, columns, descending, per_page, cursor)
+
+def hot_queries():
+    """name -> statement, built by the same calls the routes make."""
+    account = account_of(1)
+    history = (
+        select(Record)
+        .options(joinedload(Record.author))
+        .where(Record.user_account == account)
+    )
+    history_keys = ([Record.time, Record.id], True)
+    logs = select(Log).options(joinedload(Log.user))
+    log_keys = ([Log.time, Log.id], True)
+    cutoff = datetime.now(timezone.utc) - timedelta(days=current_app.config["LOG_RETENTION_DAYS"])
+
+    queries = {
+        "member history: first page": keyset_query(history, *history_keys, RECORDS_PER_PAGE),
+        "member history: next page": second_page(
+            history, "records", *history_keys, RECORDS_PER_PAGE, scalars=True
+        ),
+        "records by author": select(Record).where(Record.author_account == account),
+        "logs: first page": keyset_query(logs, *log_keys, LOGS_PER_PAGE),
+        "logs: next page": second_page(logs, "logs", *log_keys, LOGS_PER_PAGE, scalars=True),
+        "logs: last page": keyset_query(logs, *log_keys, LOGS_PER_PAGE, backward=True),
+        "logs: search": keyset_query(logs.filter(log_filter(SEARCH_LOG)), *log_keys, LOGS_PER_PAGE),
+        "ledger: verify": ledger._balances_query(),
+        "logs: retention purge": purge_batch(cutoff, current_app.config["LOG_PURGE_BATCH_SIZE"]),
+    }
+    for sort in SORTS:
+        columns, descending = sort_keys(sort)
+        queries[f"leaderboard: {sort}"] = keyset_query(
+            leaderboard_query(), columns, descending, USERS_PER_PAGE
+        )
+        queries[f"leaderboard: {sort}, next page"] = second_page(
+            leaderboard_query(), sort, columns, descending, USERS_PER_PAGE
+        )
+        queries[f"leaderboard: {sort}, search"] = keyset_query(
+            leaderboard_query(SEARCH_USER), columns, descending, USERS_PER_PAGE
+        )
+    return queries
+
+def compile_sql(stmt) -> str:
+    return str(stmt.compile(dialect=db.engine.dialect, compile_kwargs={"literal_binds": True}))
+
+def plan_postgresql(sql: str):
+    plan = db.session.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    lines, seq_scans, sorts = [], [], []
+
+    def walk(node, depth):
+        label = node["Node Type"]
+        if "Relation Name" in node:
+            label += f" on {node['Relation Name']}"
+        if "Index Name" in node:
+            label += f" using {node['Index Name']}"
+        lines.append("  " * depth + label)
+        if node["Node Type"] == "Seq Scan":
+            seq_scans.append(node.get("Relation Name"))
+        if node["Node Type"] == "Sort":
+            sorts.append(label)
+        for child in node.get("Plans", []):
+            walk(child, depth + 1)
+
+    walk(plan[0]["Plan"], 0)
+    return lines, seq_scans, sorts
+
+def plan_sqlite(sql: str):
+    rows = db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+    lines = [row[-1] for row in rows]
+    seq_scans = [line for line in lines if line.startswith("SCAN") and "USING" not in line]
+    sorts = [line for line in lines if line.startswith("USE TEMP B-TREE")]
+    return lines, seq_scans, sorts
+
+def check(name: str, lines, seq_scans, sorts) -> str:
+    """The plan's problem, or None."""
+    required = REQUIRED_INDEXES.get(name)
+    if required is not None and not any(required in line for line in lines):
+        return f"NOT USING {required}"
+    if seq_scans and required is None:
+        return "SEQ SCAN"
+    if sorts and name not in SORTED_QUERIES and not name.endswith("search"):
+        return "SORT"
+    return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--records", type=int, default=50000)
+    parser.add_argument("--logs", type=int, default=50000)
+    args = parser.parse_args()
+
+    app = bench_app()
+    failed = []
+    with app.app_context():
+        seed_users(0, args.users)
+        seed_records(args.records, args.users)
+        seed_logs(args.logs, args.users)
+        ledger.rebuild()    # checkpoints, so the ledger reads the records after them
+        postgres = db.engine.dialect.name == "postgresql"
+        db.session.execute(text("ANALYZE"))
+
+        for name, stmt in hot_queries().items():
+            lines, seq_scans, sorts = (plan_postgresql if postgres else plan_sqlite)(compile_sql(stmt))
+            problem = check(name, lines, seq_scans, sorts)
+            print(f"[{problem or 'ok'}] {name}")
+            for line in lines:
+                print(f"    {line}")
+            if problem:
+                failed.append(name)
+            db.session.rollback()
+
+    if failed:
+        print(f"\n{len(failed)} hot queries regressed: {', '.join(failed)}")
+        sys.exit(1)
+    print("\nall hot queries use an index")
+
+if __name__ == "__main__":
+    main()
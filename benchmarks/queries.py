@@ -0,0 +1,73 @@
+"""Query-count budgets for the admin views.
+
+    python -m benchmarks.queries
+
+Renders each admin view through the Flask test client against a seeded
+database, counts the SQL statements it issues, and exits with status 1
+if any view exceeds its budget. An N+1 lazy load shows up here as a
+count that grows with the number of rows on the page.
+"""
+import sys
+from sqlalchemy import event
+
+from app.extensions import db
+
+from .seed import (
+    BASE_URL, account_of, bench_app, login,
+    seed_admins, seed_logs, seed_records, seed_users,
+)
+
+USERS = 200
+RECORDS = 5000
+LOGS = 500
+
+def budgets():
+    batch = ",".join(account_of(i) for i in range(1, 41))
+    return {
+        # session user + leaderboard page
+        "/admin": 2,
+        "/admin?sort=points_desc": 2,
+        "/admin?search=member00001": 2,
+        # + target user + one page of records with their authors
+        f"/admin?target={account_of(1)}": 4,
+        # + one query for every target together
+        f"/admin?target={batch}": 3,
+        # one page of logs with their users
+        "/logs": 1,
+        # session user + their records
+        "/": 2,
+    }
+
+def main():
+    app = bench_app()
+    with app.app_context():
+        seed_users(0, USERS)
+        seed_admins(5)
+        seed_records(RECORDS, USERS)
+        seed_logs(LOGS, USERS)
+        engine = db.engine
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    client = login(app.test_client())
+    failed = []
+    for url, budget in budgets().items():
+        # warm the per-worker caches (admin roster, page totals) first
+        client.get(url, base_url=BASE_URL)
+        statements.clear()
+        response = client.get(url, base_url=BASE_URL)
+        assert response.status_code == 200, (url, response.status_code)
+        status = "ok" if len(statements) <= budget else "OVER"
+        print(f"[{status}] {url[:60]:<60} {len(statements):>3} queries (budget {budget})")
+        if len(statements) > budget:
+            failed.append(url)
+            for statement in statements:
+                print("    " + " ".join(statement.split())[:160])
+
+    if failed:
+        print(f"\n{len(failed)} views exceeded their query budget")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
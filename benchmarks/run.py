@@ -0,0 +1,159 @@
+"""Time every route against a seeded database and write a JSON report.
+
+    python -m benchmarks.run [--scale small|medium|large] [--users N]
+                             [--records N] [--logs N] [--repeat N]
+                             [--output bench_report.json] [--baseline old.json]
+
+Set BENCH_DATABASE_URL to benchmark a local PostgreSQL instance instead
+of a throwaway SQLite file. Each route is requested --repeat times
+through the Flask test client after one warm-up request; the report has
+p50/p95 latency in milliseconds, the median number of SQL statements and
+the response size per route. With --baseline, the p50 of each route is
+compared against an earlier report.
+"""
+import argparse
+import json
+import math
+import platform
+import statistics
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from sqlalchemy import event
+
+from app.extensions import db
+
+from .seed import (
+    BASE_URL, PASSWORD, account_of, bench_app, login,
+    seed_admins, seed_logs, seed_records, seed_users,
+)
+
+SCALES = {
+    "small": {"users": 1_000, "records": 10_000, "logs": 10_000},
+    "medium": {"users": 10_000, "records": 100_000, "logs": 100_000},
+    "large": {"users": 10_000, "records": 1_000_000, "logs": 1_000_000},
+}
+
+SORTS = ["account_asc", "account_desc", "name_asc", "name_desc", "points_asc", "points_desc"]
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    index = max(math.ceil(p / 100 * len(ordered)) - 1, 0)
+    return ordered[index]
+
+def routes(users: int, postgres: bool):
+    """(name, method, url, form data) for every benchmarked request."""
+    member = account_of(users // 2)
+    # the Records CSV/Excel query converts time zones with PostgreSQL
+    # syntax; the SQL dump is portable
+    table = "Records" if postgres else "Users"
+    batch = ",".join(account_of(i) for i in range(min(200, users)))
+
+    yield "index", "GET", "/", None
+    for sort in SORTS:
+        yield f"admin sort={sort}", "GET", f"/admin?sort={sort}", None
+    yield "admin search", "GET", f"/admin?search={member[-5:]}", None
+    yield "admin target", "GET", f"/admin?target={member}", None
+    yield "logs", "GET", "/logs", None
+    yield "logs search", "GET", f"/logs?q={member}", None
+    for format_ in ("csv", "excel"):
+        yield f"export {format_}", "POST", "/export", {"table": table, "format": format_}
+    yield "export sql", "POST", "/export", {"table": "Records", "format": "sql"}
+    yield "admin_batch_adjust", "POST", "/admin/batch_adjust", {
+        "accounts": batch, "op": "add", "amount": "1", "reason": "benchmark",
+    }
+    yield "login_post", "POST", "/login", {"account": member, "password": PASSWORD}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--users", type=int)
+    parser.add_argument("--records", type=int)
+    parser.add_argument("--logs", type=int)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", default="bench_report.json")
+    parser.add_argument("--baseline")
+    args = parser.parse_args()
+
+    scale = dict(SCALES[args.scale])
+    for key in scale:
+        if getattr(args, key) is not None:
+            scale[key] = getattr(args, key)
+
+    app = bench_app()
+    started = time.perf_counter()
+    with app.app_context():
+        seed_users(0, scale["users"])
+        seed_admins(min(20, scale["users"]))
+        seed_records(scale["records"], scale["users"])
+        seed_logs(scale["logs"], scale["users"])
+        engine = db.engine
+        postgres = engine.dialect.name == "postgresql"
+    print(f"seeded {scale} on {engine.dialect.name} in {time.perf_counter() - started:.1f}s")
+
+    # count statements issued by the request thread only, not by
+    # background writers sharing the engine
+    counting = {"thread": None, "count": 0}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(*args):
+        if threading.get_ident() == counting["thread"]:
+            counting["count"] += 1
+
+    client = login(app.test_client())
+    results = {}
+    for name, method, url, data in routes(scale["users"], postgres):
+        timings, counts, size = [], [], 0
+        for i in range(args.repeat + 1):
+            counting["thread"], counting["count"] = threading.get_ident(), 0
+            start = time.perf_counter()
+            if method == "GET":
+                response = client.get(url, base_url=BASE_URL)
+            else:
+                response = client.post(url, data=data, base_url=BASE_URL)
+            body = response.get_data()
+            elapsed = (time.perf_counter() - start) * 1000
+            counting["thread"] = None
+            if response.status_code >= 400:
+                sys.exit(f"{name}: HTTP {response.status_code}")
+            if i == 0:
+                continue    # warm-up
+            timings.append(elapsed)
+            counts.append(counting["count"])
+            size = len(body)
+        if name == "login_post":
+            login(client)   # logging in as the member dropped admin rights
+
+        results[name] = {
+            "p50_ms": round(percentile(timings, 50), 3),
+            "p95_ms": round(percentile(timings, 95), 3),
+            "queries": statistics.median(counts),
+            "bytes": size,
+        }
+        print(f"{name:<24} p50 {results[name]['p50_ms']:>9.2f} ms  "
+              f"p95 {results[name]['p95_ms']:>9.2f} ms  {results[name]['queries']:>5} queries")
+
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "database": engine.dialect.name,
+        "python": platform.python_version(),
+        "scale": scale,
+        "repeat": args.repeat,
+        "routes": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"report written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["routes"]
+        print(f"\n{'route':<24} {'baseline':>10} {'now':>10} {'change':>8}")
+        for name, result in results.items():
+            if name in baseline:
+                before, now = baseline[name]["p50_ms"], result["p50_ms"]
+                print(f"{name:<24} {before:>10.2f} {now:>10.2f} {now / before:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
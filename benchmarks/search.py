@@ -0,0 +1,67 @@
+"""Search latency as the users and logs tables grow.
+
+    python -m benchmarks.search [--scales 1000,10000,100000] [--repeat 20]
+
+With BENCH_DATABASE_URL pointing at PostgreSQL the trigram indexes keep
+the numbers roughly flat across scales; on SQLite they grow with the
+table, which is the scan the indexes remove.
+"""
+import argparse
+import random
+import statistics
+import time
+from sqlalchemy import select
+
+from app.extensions import db
+from app.leaderboard import leaderboard_query
+from app.models.log import Log
+from app.search import log_filter
+
+from .seed import account_of, bench_app, name_of, seed_logs, seed_users
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", default="1000,10000,100000")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    scales = sorted(int(s) for s in args.scales.split(","))
+
+    app = bench_app()
+    rng = random.Random(0)
+    seeded = 0
+    print(f"{'rows':>10}  {'user name':>10}  {'user acct':>10}  {'log text':>10}   (median ms)")
+    with app.app_context():
+        for scale in scales:
+            seed_users(seeded, scale)
+            seed_logs(scale - seeded, scale, seed=scale)
+            seeded = scale
+            if db.engine.dialect.name == "postgresql":
+                db.session.execute(db.text("ANALYZE"))
+
+            def by_name():
+                term = name_of(rng.randrange(scale))[-5:]
+                db.session.execute(leaderboard_query(term).limit(20)).all()
+
+            def by_account():
+                term = account_of(rng.randrange(scale))[-6:]
+                db.session.execute(leaderboard_query(term).limit(20)).all()
+
+            def by_log():
+                term = account_of(rng.randrange(scale))
+                db.session.execute(
+                    select(Log).filter(log_filter(term)).order_by(Log.time.desc()).limit(20)
+                ).all()
+
+            print(f"{scale:>10}  {timed(by_name, args.repeat):>10.2f}  "
+                  f"{timed(by_account, args.repeat):>10.2f}  {timed(by_log, args.repeat):>10.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Synthetic data for the benchmarks.
+
+The database comes from BENCH_DATABASE_URL (e.g. a local PostgreSQL
+instance) and defaults to a throwaway SQLite file.
+"""
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import insert, text
+from werkzeug.security import generate_password_hash
+
+from app import create_app
+from app.config import Config
+from app.extensions import db
+from app.models.user import User
+from app.models.record import Record
+from app.models.log import Log
+from app.models.admin import Admin
+
+CHUNK = 5000
+AUTHORS = 20    # records are authored by the first AUTHORS accounts
+PASSWORD = "bench-pass"
+BASE_URL = "https://localhost"
+
+def bench_config():
+    url = os.environ.get("BENCH_DATABASE_URL")
+    if not url:
+        url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.sqlite')}"
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = url
+        TESTING = True
+
+    return BenchConfig
+
+def bench_app():
+    """App bound to a fresh, empty benchmark schema."""
+    app = create_app(bench_config())
+    with app.app_context():
+        if db.engine.dialect.name == "postgresql":
+            with db.engine.begin() as conn:
+                conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        db.drop_all()
+        db.create_all()
+    return app
+
+def account_of(i: int) -> str:
+    return f"{100000000 + i:09d}"
+
+def name_of(i: int) -> str:
+    return f"member{i:07d}"
+
+def _chunks(rows):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= CHUNK:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def seed_users(start: int, stop: int):
+    password_hash = generate_password_hash(PASSWORD)
+    rows = (
+        {"account": account_of(i), "name": name_of(i), "password_hash": password_hash,
+         "points": 0, "record_count": 0}
+        for i in range(start, stop)
+    )
+    for chunk in _chunks(rows):
+        db.session.execute(insert(User), chunk)
+    db.session.commit()
+
+def seed_admins(count: int):
+    """Make the first `count` accounts (the record authors) admins."""
+    db.session.execute(insert(Admin), [{"account": account_of(i)} for i in range(count)])
+    db.session.commit()
+
+def login(client, account: str = None):
+    """Log the Flask test client in; the app only issues secure cookies."""
+    response = client.post(
+        "/login",
+        data={"account": account or account_of(0), "password": PASSWORD},
+        base_url=BASE_URL,
+    )
+    assert response.status_code == 302, response.status_code
+    return client
+
+def seed_records(count: int, users: int, seed: int = 0):
+    """Insert `count` records spread over the first `users` accounts and
+    fold them into the per-user points/record_count columns."""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    totals = {}
+
+    def rows():
+        for _ in range(count):
+            account = account_of(rng.randrange(users))
+            amount = rng.choice((1, 1, 2, 3, -1))
+            total = totals.setdefault(account, [0, 0])
+            total[0] += amount
+            total[1] += 1
+            yield {
+                "user_account": account,
+                "author_account": account_of(rng.randrange(min(AUTHORS, users))),
+                "time": now - timedelta(minutes=rng.randrange(60 * 24 * 365)),
+                "type": "add" if amount > 0 else "remove",
+                "amount": amount,
+                "reason": rng.choice(("社課", "練琴", "活動出席", "幹部會議")),
+            }
+
+    for chunk in _chunks(rows()):
+        db.session.execute(insert(Record), chunk)
+    db.session.execute(
+        text("UPDATE users SET points = points + :p, record_count = record_count + :c WHERE account = :a"),
+        [{"a": a, "p": p, "c": c} for a, (p, c) in totals.items()],
+    )
+    db.session.commit()
+
+def seed_logs(count: int, users: int, seed: int = 0):
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    rows = (
+        {
+            "user_account": account_of(0),
+            "time": now - timedelta(seconds=rng.randrange(7 * 24 * 3600)),
+            "url": "/admin/adjust",
+            "log": f"Add {n % 5 + 1} points from {account_of(rng.randrange(users))} for the reason [ bench {n} ]",
+        }
+        for n in range(count)
+    )
+    for chunk in _chunks(rows):
+        db.session.execute(insert(Log), chunk)
+    db.session.commit()
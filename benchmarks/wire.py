@@ -0,0 +1,75 @@
+"""Bytes on the wire per page, uncompressed vs. compressed, and what a
+repeat visit costs in static asset requests.
+
+    python -m benchmarks.wire [--users N] [--records N] [--logs N]
+"""
+import argparse
+import re
+
+from app.compress import brotli
+
+from .seed import (
+    BASE_URL, account_of, bench_app, login,
+    seed_admins, seed_logs, seed_records, seed_users,
+)
+
+PAGES = [
+    ("index", "GET", "/", None),
+    ("admin", "GET", "/admin", None),
+    ("admin target", "GET", f"/admin?target={account_of(1)}", None),
+    ("logs", "GET", "/logs", None),
+    ("api leaderboard", "GET", "/api/v1/leaderboard", None),
+    ("export csv", "POST", "/export", {"table": "Users", "format": "csv"}),
+    ("export sql", "POST", "/export", {"table": "Records", "format": "sql"}),
+]
+
+def fetch(client, method, url, data, encoding):
+    headers = {"Accept-Encoding": encoding} if encoding else {}
+    if method == "GET":
+        response = client.get(url, base_url=BASE_URL, headers=headers)
+    else:
+        response = client.post(url, data=data, base_url=BASE_URL, headers=headers)
+    body = response.get_data()
+    response.close()
+    return response, len(body)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--records", type=int, default=10_000)
+    parser.add_argument("--logs", type=int, default=10_000)
+    args = parser.parse_args()
+
+    app = bench_app()
+    with app.app_context():
+        seed_users(0, args.users)
+        seed_admins(min(20, args.users))
+        seed_records(args.records, args.users)
+        seed_logs(args.logs, args.users)
+    client = login(app.test_client())
+
+    encodings = ["gzip"] + (["br"] if brotli is not None else [])
+    print(f"{'page':<18} {'identity':>10}" + "".join(f" {e:>10}" for e in encodings))
+    totals = [0] * (len(encodings) + 1)
+    for name, method, url, data in PAGES:
+        sizes = [fetch(client, method, url, data, None)[1]]
+        for encoding in encodings:
+            response, size = fetch(client, method, url, data, encoding)
+            assert response.headers.get("Content-Encoding") == encoding, name
+            sizes.append(size)
+        totals = [t + s for t, s in zip(totals, sizes)]
+        print(f"{name:<18} {sizes[0]:>10}" + "".join(f" {s:>10}" for s in sizes[1:]))
+    print(f"{'total':<18} {totals[0]:>10}" + "".join(f" {t:>10}" for t in totals[1:]))
+
+    # static assets: fingerprinted URLs are immutable, so a repeat visit
+    # needs no request at all instead of one revalidation per asset
+    page = client.get("/admin", base_url=BASE_URL).get_data(as_text=True)
+    assets = re.findall(r'(?:href|src)="(/static/[^"]+)"', page)
+    print(f"\n{'asset':<40} {'bytes':>8}  cache-control")
+    for url in assets:
+        response = client.get(url, base_url=BASE_URL)
+        print(f"{url:<40} {len(response.get_data()):>8}  {response.headers.get('Cache-Control')}")
+        response.close()
+
+if __name__ == "__main__":
+    main()
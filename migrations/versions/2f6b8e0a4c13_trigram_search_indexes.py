@@ -0,0 +1,39 @@
+"""trigram search indexes
+
+Revision ID: 2f6b8e0a4c13
+Revises: 9c41d7e2b5a8
+Create Date: 2026-10-17 11:40:05.118274
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2f6b8e0a4c13'
+down_revision = '9c41d7e2b5a8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # pg_trgm is PostgreSQL only; other backends keep scanning for ILIKE '%q%'
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index('ix_users_account_trgm', 'users', ['account'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'account': 'gin_trgm_ops'})
+    op.create_index('ix_users_name_trgm', 'users', ['name'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+    op.create_index('ix_logs_log_trgm', 'logs', ['log'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'log': 'gin_trgm_ops'})
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.drop_index('ix_logs_log_trgm', table_name='logs')
+    op.drop_index('ix_users_name_trgm', table_name='users')
+    op.drop_index('ix_users_account_trgm', table_name='users')
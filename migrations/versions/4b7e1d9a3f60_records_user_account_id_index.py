@@ -0,0 +1,27 @@
+"""records user_account id index
+
+Revision ID: 4b7e1d9a3f60
+Revises: f3a9d1c7b452
+Create Date: 2026-10-17 22:34:08.217465
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b7e1d9a3f60'
+down_revision = 'f3a9d1c7b452'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # the ledger sums a member's records after their checkpoint id
+    with op.batch_alter_table('records', schema=None) as batch_op:
+        batch_op.create_index('ix_records_user_account_id', ['user_account', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('records', schema=None) as batch_op:
+        batch_op.drop_index('ix_records_user_account_id')
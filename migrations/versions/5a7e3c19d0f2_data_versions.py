@@ -0,0 +1,28 @@
+"""data versions
+
+Revision ID: 5a7e3c19d0f2
+Revises: 2f6b8e0a4c13
+Create Date: 2026-10-17 13:05:52.730641
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5a7e3c19d0f2'
+down_revision = '2f6b8e0a4c13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('data_versions',
+    sa.Column('key', sa.String(length=32), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade():
+    op.drop_table('data_versions')
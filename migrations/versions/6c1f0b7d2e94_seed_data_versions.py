@@ -0,0 +1,33 @@
+"""seed data versions
+
+Revision ID: 6c1f0b7d2e94
+Revises: d14c2a9f7b36
+Create Date: 2026-10-17 20:02:37.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6c1f0b7d2e94'
+down_revision = 'd14c2a9f7b36'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # every write now bumps these, so create the rows up front rather than
+    # letting the first concurrent writers race to insert them
+    data_versions = sa.table('data_versions',
+        sa.column('key', sa.String(length=32)),
+        sa.column('version', sa.Integer()),
+    )
+    op.bulk_insert(data_versions, [
+        {'key': 'users', 'version': 1},
+        {'key': 'records', 'version': 1},
+    ])
+
+
+def downgrade():
+    op.execute("DELETE FROM data_versions WHERE key IN ('users', 'records')")
@@ -0,0 +1,46 @@
+"""points rollups
+
+Revision ID: 8e2d4b6a9c51
+Revises: 6c1f0b7d2e94
+Create Date: 2026-10-17 20:41:09.552317
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e2d4b6a9c51'
+down_revision = '6c1f0b7d2e94'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # filled by `flask rollups backfill` once, then kept up to date by the app
+    op.create_table('daily_points',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('type', sa.String(length=7), nullable=False),
+    sa.Column('author_account', sa.String(length=9), nullable=False),
+    sa.Column('records', sa.Integer(), nullable=False),
+    sa.Column('points', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'type', 'author_account')
+    )
+    op.create_table('semester_points',
+    sa.Column('semester', sa.String(length=6), nullable=False),
+    sa.Column('user_account', sa.String(length=9), nullable=False),
+    sa.Column('records', sa.Integer(), nullable=False),
+    sa.Column('points', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_account'], ['users.account'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('semester', 'user_account')
+    )
+    with op.batch_alter_table('semester_points', schema=None) as batch_op:
+        batch_op.create_index('ix_semester_points_semester_points', ['semester', 'points'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('semester_points', schema=None) as batch_op:
+        batch_op.drop_index('ix_semester_points_semester_points')
+
+    op.drop_table('semester_points')
+    op.drop_table('daily_points')
@@ -0,0 +1,37 @@
+"""leaderboard columns
+
+Revision ID: 9c41d7e2b5a8
+Revises: e672967f65f1
+Create Date: 2026-10-17 10:12:31.482910
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c41d7e2b5a8'
+down_revision = 'e672967f65f1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('record_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.create_index('ix_users_name_account', ['name', 'account'], unique=False)
+        batch_op.create_index('ix_users_points_account', ['points', 'account'], unique=False)
+
+    # resync the denormalized columns with the records they summarize
+    op.execute("""
+        UPDATE users SET
+            points = COALESCE((SELECT SUM(amount) FROM records WHERE records.user_account = users.account), 0),
+            record_count = (SELECT COUNT(*) FROM records WHERE records.user_account = users.account)
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index('ix_users_points_account')
+        batch_op.drop_index('ix_users_name_account')
+        batch_op.drop_column('record_count')
@@ -0,0 +1,29 @@
+"""seed admins version
+
+Revision ID: a5c8e2f1d3b7
+Revises: 4b7e1d9a3f60
+Create Date: 2026-10-17 22:51:46.730921
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a5c8e2f1d3b7'
+down_revision = '4b7e1d9a3f60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # the admin roster is versioned too (6c1f0b7d2e94 only seeded users and
+    # records); the first toggle_admin may already have created the row
+    op.execute(
+        "INSERT INTO data_versions (key, version) VALUES ('admins', 1) "
+        "ON CONFLICT (key) DO NOTHING"
+    )
+
+
+def downgrade():
+    op.execute("DELETE FROM data_versions WHERE key = 'admins'")
@@ -0,0 +1,36 @@
+"""hot path indexes
+
+Revision ID: b83d5f6a1e07
+Revises: 5a7e3c19d0f2
+Create Date: 2026-10-17 14:21:37.904152
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b83d5f6a1e07'
+down_revision = '5a7e3c19d0f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('records', schema=None) as batch_op:
+        batch_op.create_index('ix_records_user_account_time', ['user_account', 'time', 'id'], unique=False)
+        batch_op.create_index('ix_records_author_account', ['author_account'], unique=False)
+
+    with op.batch_alter_table('logs', schema=None) as batch_op:
+        batch_op.create_index('ix_logs_time_id', ['time', 'id'], unique=False)
+        batch_op.create_index('ix_logs_user_account', ['user_account'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('logs', schema=None) as batch_op:
+        batch_op.drop_index('ix_logs_user_account')
+        batch_op.drop_index('ix_logs_time_id')
+
+    with op.batch_alter_table('records', schema=None) as batch_op:
+        batch_op.drop_index('ix_records_author_account')
+        batch_op.drop_index('ix_records_user_account_time')
@@ -0,0 +1,32 @@
+"""points checkpoints
+
+Revision ID: d14c2a9f7b36
+Revises: b83d5f6a1e07
+Create Date: 2026-10-17 15:48:10.265903
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd14c2a9f7b36'
+down_revision = 'b83d5f6a1e07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('points_checkpoints',
+    sa.Column('user_account', sa.String(length=9), nullable=False),
+    sa.Column('record_id', sa.Integer(), nullable=False),
+    sa.Column('balance', sa.Integer(), nullable=False),
+    sa.Column('record_count', sa.Integer(), nullable=False),
+    sa.Column('time', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['user_account'], ['users.account'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_account')
+    )
+
+
+def downgrade():
+    op.drop_table('points_checkpoints')
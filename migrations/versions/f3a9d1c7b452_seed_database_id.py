@@ -0,0 +1,34 @@
+"""seed database id
+
+Revision ID: f3a9d1c7b452
+Revises: 8e2d4b6a9c51
+Create Date: 2026-10-17 21:40:12.503118
+
+"""
+import secrets
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a9d1c7b452'
+down_revision = '8e2d4b6a9c51'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # random id of this database, part of every export snapshot's file
+    # name so files written from another database are never served
+    data_versions = sa.table('data_versions',
+        sa.column('key', sa.String(length=32)),
+        sa.column('version', sa.Integer()),
+    )
+    op.bulk_insert(data_versions, [
+        {'key': 'database', 'version': secrets.randbelow(2**31 - 1) + 1},
+    ])
+
+
+def downgrade():
+    op.execute("DELETE FROM data_versions WHERE key = 'database'")